@@ -33,10 +33,13 @@ function setup() {
         mosaicking: "ORBIT",
       },
     ],
-    output: {
-      bands: 2,
-      sampleType: "FLOAT32",
-    },
+    output: [
+      {
+        id: "default",
+        bands: 2,
+        sampleType: "FLOAT32",
+      },
+    ],
   };
 }
 
@@ -55,6 +58,8 @@ function percentile(sorted, p) {
   return sorted[lo] + (sorted[hi] - sorted[lo]) * (idx - lo);
 }
 
+var monitoredPixels = 0;
+
 function evaluatePixel(samples) {
   if (samples[c.DATASOURCE].length == 0) {
     return [NaN, NaN];
@@ -68,6 +73,11 @@ function evaluatePixel(samples) {
   if (residuals.length == 0) {
     return [NaN, NaN];
   }
+  monitoredPixels++;
   residuals.sort((a, b) => a - b);
   return [percentile(residuals, 0.25), percentile(residuals, 0.75)];
 }
+
+function updateOutputMetadata(scenes, inputMetadata, outputMetadata){
+  outputMetadata.userData = {"monitoredPixels": monitoredPixels}
+}
@@ -33,10 +33,13 @@ function setup() {
         mosaicking: "ORBIT",
       },
     ],
-    output: {
-      bands: 2,
-      sampleType: "FLOAT32",
-    },
+    output: [
+      {
+        id: "default",
+        bands: 2,
+        sampleType: "FLOAT32",
+      },
+    ],
   };
 }
 
@@ -48,6 +51,8 @@ function preProcessScenes(collections) {
   return collections;
 }
 
+var monitoredPixels = 0;
+
 function evaluatePixel(samples) {
   if (samples[c.DATASOURCE].length == 0) {
     return [NaN, NaN];
@@ -61,7 +66,12 @@ function evaluatePixel(samples) {
   if (residuals.length == 0) {
     return [NaN, NaN];
   }
+  monitoredPixels++;
   const mse = residuals.reduce((sum, r) => sum + r * r, 0) / residuals.length;
   const rmse = Math.sqrt(mse);
   return [rmse, rmse];
 }
+
+function updateOutputMetadata(scenes, inputMetadata, outputMetadata){
+  outputMetadata.userData = {"monitoredPixels": monitoredPixels}
+}
@@ -7,13 +7,11 @@ from importlib.resources.abc import Traversable
 from io import BytesIO
 from pathlib import Path
 
-import numpy as np
-import rasterio
 from rasterio.io import MemoryFile
 
 from .cog import write_metric, write_models, write_monitor
 from .constants import DATA_PATH, FEATURE_ID_COLUMN, Endpoints
-from .geo_config_handler import GeoConfigHandler, geo_config
+from .geo_config_handler import GeoConfigHandler, get_geo_config
 from .monitor_params import MonitorParameters
 from .resources import BYOC, S3, ResourceManager, SHClient, SHConfiguration
 
@@ -21,7 +19,7 @@ from .resources import BYOC, S3, ResourceManager, SHClient, SHConfiguration
 class Backend:
     def __init__(self, monitor_params: MonitorParameters, config: GeoConfigHandler | None = None) -> None:
         self.monitor_params = monitor_params
-        self.config = config or geo_config
+        self.config = config or get_geo_config()
 
     def init_model(self) -> None:
         raise NotImplementedError
@@ -42,11 +40,12 @@ class Backend:
         backend_dict = self.as_dict()
         backend_type = type(self).__name__
 
-        # Save monitor parameters
-        self.config.save_monitor_params(self.monitor_params)
+        with self.config.batch():
+            # Save monitor parameters
+            self.config.save_monitor_params(self.monitor_params)
 
-        # Save backend configuration
-        self.config.save_backend_config(self.monitor_params.name, backend_type, backend_dict)
+            # Save backend configuration
+            self.config.save_backend_config(self.monitor_params.name, backend_type, backend_dict)
 
     def delete(self) -> None:
         """
@@ -72,6 +71,23 @@ def prepare_evalscript(monitor_params: MonitorParameters, path: Path | Traversab
     return "\n".join(split_config)
 
 
+def read_tar_response(content: bytes) -> tuple[dict, bytes]:
+    """
+    Split a tar response of the Process API into the parsed userdata and the content of default.tif
+    """
+    with tarfile.open(fileobj=BytesIO(content)) as tar:
+        # Find the userdata.json file
+        userdata_file = tar.extractfile("userdata.json")  # Extract it in memory
+        assert userdata_file
+        # Parse the JSON content into a dictionary
+        userdata_dict = json.loads(userdata_file.read())
+
+        # Find the default.tif file
+        output_tif = tar.extractfile("default.tif")  # Extract it in memory
+        assert output_tif
+        return userdata_dict, output_tif.read()
+
+
 class ProcessAPI(Backend):
     def __init__(
         self,
@@ -142,8 +158,8 @@ class ProcessAPI(Backend):
             self.config.update_monitor_state(self.monitor_params.name, "FAILED")
 
         with ResourceManager(rollback=self.rollback, on_failure_callback=set_failed_status) as manager:
-            print("0/6 Initializing model")
-            print("1/6 Creating bucket")
+            print("0/9 Initializing model")
+            print("1/9 Creating bucket")
             self.s3.create_bucket(self.urls.bucket_location)
             self.s3.update_policy(
                 new_statements=[
@@ -164,32 +180,41 @@ class ProcessAPI(Backend):
                 ]
             )
             manager.add_resource(self.s3)
-            print("2/6 BYOC")
+            print("2/9 BYOC")
             self.byoc_id = self.byoc.create_byoc()
             manager.add_resource(self.byoc)
-            for feature in self.geometries.iterfeatures():
-                feature_id = feature["properties"][FEATURE_ID_COLUMN]
-                geometry = feature["geometry"]
-                print("2/6 Fitting model")
-                models = self.compute_models(geometry)
-                print("3/6 Writing model to bucket")
+            # Time ranges are the same for every feature
+            fit_from = f"{self.monitor_params.fit_start.isoformat()}T00:00:00Z"
+            monitoring_start = self.monitor_params.monitoring_start.isoformat()
+            mon_to = f"{monitoring_start}T00:00:00Z"
+            mon_to_eod = f"{monitoring_start}T23:59:59Z"
+            # Monitored pixel counts are written in one transaction once all features are done
+            monitored_pixels_by_feature = {}
+            features = [
+                (feature["properties"][FEATURE_ID_COLUMN], feature["geometry"])
+                for feature in self.geometries.iterfeatures()
+            ]
+            for feature_id, geometry in features:
+                print("3/9 Fitting model")
+                models = self.compute_models(geometry, fit_from, mon_to)
+                print("4/9 Writing model to bucket")
                 with MemoryFile(models) as memfile:
                     write_models(memfile, self.s3, feature_id)
-                print("4/6 Ingesting model to SH")
-                self.byoc.ingest_tile(self.monitor_params.monitoring_start, feature_id)
-                print("5/6 Computing metric")
-                metrics = self.compute_metric(geometry)
-                print("6/6 Writing metric to bucket")
+            # The tiles of all models are ingested in one concurrent batch before any metric is computed
+            print("5/9 Ingesting models to SH")
+            self.byoc.ingest_tiles([(self.monitor_params.monitoring_start, feature_id) for feature_id, _ in features])
+            for feature_id, geometry in features:
+                print("6/9 Computing metric")
+                metrics, monitored_pixels = self.compute_metric(geometry, fit_from, mon_to, mon_to_eod)
+                monitored_pixels_by_feature[feature_id] = monitored_pixels
+                print("7/9 Writing metric to bucket")
                 with MemoryFile(metrics) as memfile:
-                    with rasterio.open(memfile) as src:
-                        array = src.read()
-                        monitored_pixels = np.count_nonzero(~np.isnan(array))
-                        self.config.update_monitored_pixels(self.monitor_params.name, feature_id, monitored_pixels)
                     write_metric(memfile, self.s3, feature_id)
-            print("5/6 Creating configuration")
+            self.config.update_many_monitored_pixels(self.monitor_params.name, monitored_pixels_by_feature.items())
+            print("8/9 Creating configuration")
             manager.add_resource(self.sh_configuration)
             self.instance_id = self.sh_configuration.create_instance()
-            print("6/6 Creating layer")
+            print("9/9 Creating layer")
             with DATA_PATH.joinpath("visualize_disturbed_date.cjs").open() as src:
                 evalscript = src.read()
             self.sh_configuration.create_layer("DISTURBED-DATE", evalscript, self.byoc_id)
@@ -197,13 +222,13 @@ class ProcessAPI(Backend):
             self.config.update_monitor_state(self.monitor_params.name, "INITIALIZED")
             self.dump()
 
-    def compute_models(self, geometry: dict) -> bytes:
+    def compute_models(self, geometry: dict, fit_from: str, mon_to: str) -> bytes:
         beta_data = [
             {
                 "dataFilter": {
                     "timeRange": {
-                        "from": f"{self.monitor_params.fit_start.isoformat()}T00:00:00Z",
-                        "to": f"{self.monitor_params.monitoring_start.isoformat()}T00:00:00Z",
+                        "from": fit_from,
+                        "to": mon_to,
                     },
                     "mosaickingOrder": "leastRecent",
                 },
@@ -223,13 +248,13 @@ class ProcessAPI(Backend):
             raise
         return beta.content
 
-    def compute_metric(self, geometry: dict) -> bytes:
+    def compute_metric(self, geometry: dict, fit_from: str, mon_to: str, mon_to_eod: str) -> tuple[bytes, int]:
         sigma_data = [
             {
                 "dataFilter": {
                     "timeRange": {
-                        "from": f"{self.monitor_params.fit_start.isoformat()}T00:00:00Z",
-                        "to": f"{self.monitor_params.monitoring_start.isoformat()}T00:00:00Z",
+                        "from": fit_from,
+                        "to": mon_to,
                     },
                     "mosaickingOrder": "leastRecent",
                 },
@@ -239,8 +264,8 @@ class ProcessAPI(Backend):
             {
                 "dataFilter": {
                     "timeRange": {
-                        "from": f"{self.monitor_params.fit_start.isoformat()}T00:00:00Z",
-                        "to": f"{self.monitor_params.monitoring_start.isoformat()}T23:59:59Z",
+                        "from": fit_from,
+                        "to": mon_to_eod,
                     }
                 },
                 "type": f"byoc-{self.byoc_id}",
@@ -253,14 +278,17 @@ class ProcessAPI(Backend):
             prepare_evalscript(self.monitor_params, DATA_PATH.joinpath(f"{self.monitor_params.metric.lower()}.cjs")),
             geometry,
         )
+        # Get userdata (returns number of monitored pixels, so the metric doesn't need to be read back)
+        sigma_request["output"]["responses"].append({"identifier": "userdata", "format": {"type": "application/json"}})
 
-        sigma = self.client.post(self.url, json=sigma_request)
+        sigma = self.client.post(self.url, json=sigma_request, headers={"Accept": "application/tar"})
         try:
             sigma.raise_for_status()
         except:
             print(sigma.text)
             raise
-        return sigma.content
+        userdata_dict, metric_tif = read_tar_response(sigma.content)
+        return metric_tif, userdata_dict["monitoredPixels"]
 
     def base_request(self, data: list, evalscript: str, geometry: dict) -> dict:
         crs = "http://www.opengis.net/def/crs/EPSG/0/3857"
@@ -297,22 +325,9 @@ class ProcessAPI(Backend):
             print(monitor_data.content)
             raise
 
-        with tarfile.open(fileobj=BytesIO(monitor_data.content)) as tar:
-            # Find the userdata.json file
-            userdata_file = tar.extractfile("userdata.json")  # Extract it in memory
-            assert userdata_file
-            # Read the content of userdata.json
-            json_data = userdata_file.read().decode("utf-8")  # Decode from bytes to string
-
-            # Parse the JSON string into a dictionary
-            userdata_dict = json.loads(json_data)
-
-            # Find the default.tif file
-            output_tif = tar.extractfile("default.tif")  # Extract it in memory
-            assert output_tif
-            # Read and write the content of default.tif
-            with MemoryFile(output_tif.read()) as memfile:
-                write_monitor(memfile, self.s3, feature_id)
+        userdata_dict, output_tif = read_tar_response(monitor_data.content)
+        with MemoryFile(output_tif) as memfile:
+            write_monitor(memfile, self.s3, feature_id)
         return userdata_dict
 
     def monitor(self, end: datetime.date | None = None) -> dict:
@@ -321,6 +336,7 @@ class ProcessAPI(Backend):
         if end is None:
             end = datetime.date.today()
         start = self.monitor_params.last_monitored
+        monitoring_start = self.monitor_params.monitoring_start.isoformat()
         monitor_data_json = [
             {
                 "dataFilter": {
@@ -336,8 +352,8 @@ class ProcessAPI(Backend):
             {
                 "dataFilter": {
                     "timeRange": {
-                        "from": f"{self.monitor_params.monitoring_start.isoformat()}T00:00:00Z",
-                        "to": f"{self.monitor_params.monitoring_start.isoformat()}T23:59:59Z",
+                        "from": f"{monitoring_start}T00:00:00Z",
+                        "to": f"{monitoring_start}T23:59:59Z",
                     }
                 },
                 "type": f"byoc-{self.byoc_id}",
@@ -354,16 +370,18 @@ class ProcessAPI(Backend):
                 feature["properties"]["lng"],
                 self.byoc_id,
                 "DISTURBED-DATE",
-                self.monitor_params.monitoring_start.strftime("%Y-%m-%d"),
+                monitoring_start,
             )
             user_data["link"] = vis_url
             feature_id = feature["properties"][FEATURE_ID_COLUMN]
             results[feature_id] = user_data
-        self.config.save_monitoring_results(self.monitor_params.name, results)
+        # Store the results together with the new last_monitored date
+        with self.config.batch():
+            self.config.save_monitoring_results(self.monitor_params.name, results)
 
-        self.monitor_params.last_monitored = end
-        self.monitor_params.state = "INITIALIZED"
-        self.dump()
+            self.monitor_params.last_monitored = end
+            self.monitor_params.state = "INITIALIZED"
+            self.dump()
         return results
 
     def delete(self) -> None:
@@ -462,8 +480,8 @@ class FreeCDSEProcessAPI(Backend):
             self.config.update_monitor_state(self.monitor_params.name, "FAILED")
 
         with ResourceManager(rollback=self.rollback, on_failure_callback=set_failed_status) as manager:
-            print("0/6 Initializing model")
-            print("1/6 Creating bucket")
+            print("0/9 Initializing model")
+            print("1/9 Creating bucket")
             self.s3.create_bucket(self.urls.bucket_location)
             self.s3.update_policy(
                 new_statements=[
@@ -484,33 +502,42 @@ class FreeCDSEProcessAPI(Backend):
                 ]
             )
             manager.add_resource(self.s3)
-            print("2/6 BYOC")
+            print("2/9 BYOC")
             self.byoc_id = self.byoc.create_byoc()
             self.byoc.share_byoc(self.account_id)
             manager.add_resource(self.byoc)
-            for feature in self.geometries.iterfeatures():
-                feature_id = feature["properties"][FEATURE_ID_COLUMN]
-                geometry = feature["geometry"]
-                print("2/6 Fitting model")
-                models = self.compute_models(geometry)
-                print("3/6 Writing model to bucket")
+            # Time ranges are the same for every feature
+            fit_from = f"{self.monitor_params.fit_start.isoformat()}T00:00:00Z"
+            monitoring_start = self.monitor_params.monitoring_start.isoformat()
+            mon_to = f"{monitoring_start}T00:00:00Z"
+            mon_to_eod = f"{monitoring_start}T23:59:59Z"
+            # Monitored pixel counts are written in one transaction once all features are done
+            monitored_pixels_by_feature = {}
+            features = [
+                (feature["properties"][FEATURE_ID_COLUMN], feature["geometry"])
+                for feature in self.geometries.iterfeatures()
+            ]
+            for feature_id, geometry in features:
+                print("3/9 Fitting model")
+                models = self.compute_models(geometry, fit_from, mon_to)
+                print("4/9 Writing model to bucket")
                 with MemoryFile(models) as memfile:
                     write_models(memfile, self.s3, feature_id)
-                print("4/6 Ingesting model to SH")
-                self.byoc.ingest_tile(self.monitor_params.monitoring_start, feature_id)
-                print("5/6 Computing metric")
-                metrics = self.compute_metric(geometry)
-                print("6/6 Writing metric to bucket")
+            # The tiles of all models are ingested in one concurrent batch before any metric is computed
+            print("5/9 Ingesting models to SH")
+            self.byoc.ingest_tiles([(self.monitor_params.monitoring_start, feature_id) for feature_id, _ in features])
+            for feature_id, geometry in features:
+                print("6/9 Computing metric")
+                metrics, monitored_pixels = self.compute_metric(geometry, fit_from, mon_to, mon_to_eod)
+                monitored_pixels_by_feature[feature_id] = monitored_pixels
+                print("7/9 Writing metric to bucket")
                 with MemoryFile(metrics) as memfile:
-                    with rasterio.open(memfile) as src:
-                        array = src.read()
-                        monitored_pixels = np.count_nonzero(~np.isnan(array))
-                        self.config.update_monitored_pixels(self.monitor_params.name, feature_id, monitored_pixels)
                     write_metric(memfile, self.s3, feature_id)
-            print("5/6 Creating configuration")
+            self.config.update_many_monitored_pixels(self.monitor_params.name, monitored_pixels_by_feature.items())
+            print("8/9 Creating configuration")
             manager.add_resource(self.sh_configuration)
             self.instance_id = self.sh_configuration.create_instance()
-            print("6/6 Creating layer")
+            print("9/9 Creating layer")
             with DATA_PATH.joinpath("visualize_disturbed_date.cjs").open() as src:
                 evalscript = src.read()
             self.sh_configuration.create_layer("DISTURBED-DATE", evalscript, self.byoc_id)
@@ -518,13 +545,13 @@ class FreeCDSEProcessAPI(Backend):
             self.config.update_monitor_state(self.monitor_params.name, "INITIALIZED")
             self.dump()
 
-    def compute_models(self, geometry: dict) -> bytes:
+    def compute_models(self, geometry: dict, fit_from: str, mon_to: str) -> bytes:
         beta_data = [
             {
                 "dataFilter": {
                     "timeRange": {
-                        "from": f"{self.monitor_params.fit_start.isoformat()}T00:00:00Z",
-                        "to": f"{self.monitor_params.monitoring_start.isoformat()}T00:00:00Z",
+                        "from": fit_from,
+                        "to": mon_to,
                     },
                     "mosaickingOrder": "leastRecent",
                 },
@@ -544,13 +571,13 @@ class FreeCDSEProcessAPI(Backend):
             raise
         return beta.content
 
-    def compute_metric(self, geometry: dict) -> bytes:
+    def compute_metric(self, geometry: dict, fit_from: str, mon_to: str, mon_to_eod: str) -> tuple[bytes, int]:
         sigma_data = [
             {
                 "dataFilter": {
                     "timeRange": {
-                        "from": f"{self.monitor_params.fit_start.isoformat()}T00:00:00Z",
-                        "to": f"{self.monitor_params.monitoring_start.isoformat()}T00:00:00Z",
+                        "from": fit_from,
+                        "to": mon_to,
                     },
                     "mosaickingOrder": "leastRecent",
                 },
@@ -560,8 +587,8 @@ class FreeCDSEProcessAPI(Backend):
             {
                 "dataFilter": {
                     "timeRange": {
-                        "from": f"{self.monitor_params.fit_start.isoformat()}T00:00:00Z",
-                        "to": f"{self.monitor_params.monitoring_start.isoformat()}T23:59:59Z",
+                        "from": fit_from,
+                        "to": mon_to_eod,
                     }
                 },
                 "type": f"byoc-{self.byoc_id}",
@@ -574,14 +601,17 @@ class FreeCDSEProcessAPI(Backend):
             prepare_evalscript(self.monitor_params, DATA_PATH.joinpath(f"{self.monitor_params.metric.lower()}.cjs")),
             geometry,
         )
+        # Get userdata (returns number of monitored pixels, so the metric doesn't need to be read back)
+        sigma_request["output"]["responses"].append({"identifier": "userdata", "format": {"type": "application/json"}})
 
-        sigma = self.client.post(self.url, json=sigma_request)
+        sigma = self.client.post(self.url, json=sigma_request, headers={"Accept": "application/tar"})
         try:
             sigma.raise_for_status()
         except:
             print(sigma.text)
             raise
-        return sigma.content
+        userdata_dict, metric_tif = read_tar_response(sigma.content)
+        return metric_tif, userdata_dict["monitoredPixels"]
 
     def base_request(self, data: list, evalscript: str, geometry: dict) -> dict:
         crs = "http://www.opengis.net/def/crs/EPSG/0/3857"
@@ -618,22 +648,9 @@ class FreeCDSEProcessAPI(Backend):
             print(monitor_data.content)
             raise
 
-        with tarfile.open(fileobj=BytesIO(monitor_data.content)) as tar:
-            # Find the userdata.json file
-            userdata_file = tar.extractfile("userdata.json")  # Extract it in memory
-            assert userdata_file
-            # Read the content of userdata.json
-            json_data = userdata_file.read().decode("utf-8")  # Decode from bytes to string
-
-            # Parse the JSON string into a dictionary
-            userdata_dict = json.loads(json_data)
-
-            # Find the default.tif file
-            output_tif = tar.extractfile("default.tif")  # Extract it in memory
-            assert output_tif
-            # Read and write the content of default.tif
-            with MemoryFile(output_tif.read()) as memfile:
-                write_monitor(memfile, self.s3, feature_id)
+        userdata_dict, output_tif = read_tar_response(monitor_data.content)
+        with MemoryFile(output_tif) as memfile:
+            write_monitor(memfile, self.s3, feature_id)
         return userdata_dict
 
     def monitor(self, end: datetime.date | None = None) -> dict:
@@ -642,6 +659,7 @@ class FreeCDSEProcessAPI(Backend):
         if end is None:
             end = datetime.date.today()
         start = self.monitor_params.last_monitored
+        monitoring_start = self.monitor_params.monitoring_start.isoformat()
         monitor_data_json = [
             {
                 "dataFilter": {
@@ -657,8 +675,8 @@ class FreeCDSEProcessAPI(Backend):
             {
                 "dataFilter": {
                     "timeRange": {
-                        "from": f"{self.monitor_params.monitoring_start.isoformat()}T00:00:00Z",
-                        "to": f"{self.monitor_params.monitoring_start.isoformat()}T23:59:59Z",
+                        "from": f"{monitoring_start}T00:00:00Z",
+                        "to": f"{monitoring_start}T23:59:59Z",
                     }
                 },
                 "type": f"byoc-{self.byoc_id}",
@@ -675,16 +693,18 @@ class FreeCDSEProcessAPI(Backend):
                 feature["properties"]["lng"],
                 self.byoc_id,
                 "DISTURBED-DATE",
-                self.monitor_params.monitoring_start.strftime("%Y-%m-%d"),
+                monitoring_start,
             )
             user_data["link"] = vis_url
             feature_id = feature["properties"][FEATURE_ID_COLUMN]
             results[feature_id] = user_data
-        self.config.save_monitoring_results(self.monitor_params.name, results)
+        # Store the results together with the new last_monitored date
+        with self.config.batch():
+            self.config.save_monitoring_results(self.monitor_params.name, results)
 
-        self.monitor_params.last_monitored = end
-        self.monitor_params.state = "INITIALIZED"
-        self.dump()
+            self.monitor_params.last_monitored = end
+            self.monitor_params.state = "INITIALIZED"
+            self.dump()
         return results
 
     def delete(self) -> None:
@@ -1,4 +1,5 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 
 import numpy as np
@@ -54,7 +55,15 @@ def write_models(in_path: str | os.PathLike, s3_resource: S3, feature_id: str |
         with BytesIO() as out:
             with rasterio.open(out, "w", **profile) as dst:
                 dst.write(zero_raster, 1)
-            s3_resource.write_binary(f"{s3_resource.root}/{feature_id}/metric_lower.tif", out)
-            s3_resource.write_binary(f"{s3_resource.root}/{feature_id}/metric_upper.tif", out)
-            s3_resource.write_binary(f"{s3_resource.root}/{feature_id}/disturbedDate.tif", out)
-            s3_resource.write_binary(f"{s3_resource.root}/{feature_id}/process.tif", out)
+            zero_tif = out.getvalue()
+        # Upload the identical zero rasters concurrently, each from its own buffer
+        bands = ["metric_lower", "metric_upper", "disturbedDate", "process"]
+        with ThreadPoolExecutor(max_workers=len(bands)) as executor:
+            futures = [
+                executor.submit(
+                    s3_resource.write_binary, f"{s3_resource.root}/{feature_id}/{band}.tif", BytesIO(zero_tif)
+                )
+                for band in bands
+            ]
+            for future in futures:
+                future.result()
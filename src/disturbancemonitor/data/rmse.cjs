@@ -120,10 +120,13 @@ function setup() {
         mosaicking: "ORBIT",
       },
     ],
-    output: {
-      bands: 2,
-      sampleType: "FLOAT32",
-    },
+    output: [
+      {
+        id: "default",
+        bands: 2,
+        sampleType: "FLOAT32",
+      },
+    ],
   };
 }
 
@@ -135,6 +138,8 @@ function preProcessScenes(collections) {
   return collections;
 }
 
+var monitoredPixels = 0;
+
 function evaluatePixel(samples) {
   if (samples[c.DATASOURCE].length == 0) {
     return [NaN, NaN];
@@ -148,7 +153,12 @@ function evaluatePixel(samples) {
   if (residuals.length == 0) {
     return [NaN, NaN];
   }
+  monitoredPixels++;
   const mse = residuals.reduce((sum, r) => sum + r * r, 0) / residuals.length;
   const rmse = Math.sqrt(mse);
   return [rmse, rmse];
 }
+
+function updateOutputMetadata(scenes, inputMetadata, outputMetadata){
+  outputMetadata.userData = {"monitoredPixels": monitoredPixels}
+}
@@ -1,13 +1,23 @@
+import atexit
 import datetime
 import json
 import logging
+import math
 import sqlite3
-from dataclasses import asdict
+import struct
+import threading
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import fields
 from pathlib import Path
+from types import TracebackType
 from typing import Any
 
 import geopandas as gpd
+import numpy as np
 import pandas as pd
+import shapely
 
 from .constants import FEATURE_ID_COLUMN, get_default_config_file_path
 from .monitor_params import MonitorParameters
@@ -15,6 +25,124 @@ from .monitor_params import MonitorParameters
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# Version of the tables written by _create_tables, files with this version are not migrated again
+SCHEMA_VERSION = "5"
+
+# Number of rows passed to a single executemany call
+INSERT_BATCH_SIZE = 10_000
+
+# Number of prepared statements each connection keeps, so repeated queries aren't parsed again
+STATEMENT_CACHE_SIZE = 256
+
+# Columns of the monitors table besides the name. geometry_path isn't stored, it always points to the monitor name.
+_MONITOR_COLUMNS = tuple(f.name for f in fields(MonitorParameters) if f.name not in ("name", "geometry_path"))
+_SAVE_MONITOR_SQL = f"""
+    INSERT INTO monitors (name, {", ".join(_MONITOR_COLUMNS)})
+    VALUES (?, {", ".join(["?"] * len(_MONITOR_COLUMNS))})
+    ON CONFLICT(name) DO UPDATE SET {", ".join(f"{column} = excluded.{column}" for column in _MONITOR_COLUMNS)}
+"""
+_SAVE_BACKEND_SQL = """
+    INSERT INTO backends (name, backend_type, config)
+    VALUES (?, ?, ?)
+    ON CONFLICT(name, backend_type) DO UPDATE SET config = excluded.config
+"""
+
+# Bind dates as ISO strings. Registered explicitly, as the default adapter of sqlite3 is deprecated
+sqlite3.register_adapter(datetime.date, datetime.date.isoformat)
+
+# Spatial index of the areas_of_interest layer and the trigger which fills it on insert
+_RTREE_TABLE = "rtree_areas_of_interest_geom"
+_RTREE_INSERT_TRIGGER = f"{_RTREE_TABLE}_insert"
+
+
+def _monitor_row(params: MonitorParameters) -> list[Any]:
+    """Get the parameters of a monitor as a row for _SAVE_MONITOR_SQL, dates are bound as ISO strings."""
+    return [params.name, *(getattr(params, column) for column in _MONITOR_COLUMNS)]
+
+
+def _dict_rows(cursor: sqlite3.Cursor) -> Iterator[dict[str, Any]]:
+    """Yield the remaining rows of a cursor as dictionaries, looking up the column names only once."""
+    columns = [column[0] for column in cursor.description]
+    for row in cursor:
+        yield dict(zip(columns, row, strict=True))
+
+
+def _gpkg_geometries(geometries: np.ndarray, bounds: list[list[float]], srs_id: int) -> list[bytes | None]:
+    """
+    Encode geometries as GeoPackage binary blobs: a header with the SRS ID and the XY envelope, followed by the
+    little endian WKB of the geometry.
+
+    Args:
+        geometries: Array of shapely geometries
+        bounds: Bounds of the geometries as returned by shapely.bounds, NaN for empty geometries
+        srs_id: SRS ID of the layer in gpkg_spatial_ref_sys
+    """
+    wkbs = shapely.to_wkb(geometries, byte_order=1, output_dimension=2).tolist()
+    # Version 0, little endian, with XY envelope
+    header = b"GP\x00\x03" + struct.pack("<i", srs_id)
+    # Version 0, little endian, empty geometry without envelope
+    empty_header = b"GP\x00\x11" + struct.pack("<i", srs_id)
+    blobs: list[bytes | None] = []
+    for wkb, (minx, miny, maxx, maxy) in zip(wkbs, bounds, strict=True):
+        if wkb is None:
+            blobs.append(None)
+        elif math.isnan(minx):
+            blobs.append(empty_header + wkb)
+        else:
+            blobs.append(header + struct.pack("<4d", minx, maxx, miny, maxy) + wkb)
+    return blobs
+
+
+# Size of the envelope in the GeoPackage geometry header, by envelope type
+_ENVELOPE_SIZES = {0: 0, 1: 32, 2: 48, 3: 48, 4: 64}
+
+
+def _gpkg_envelope(blob: bytes | None) -> tuple[float, float, float, float] | None:
+    """
+    Get the XY envelope (minx, maxx, miny, maxy) of a GeoPackage geometry blob, None for empty geometries and
+    anything that isn't a GeoPackage geometry.
+    """
+    if not isinstance(blob, bytes) or len(blob) < 8 or blob[:2] != b"GP":
+        return None
+    flags = blob[3]
+    envelope_size = _ENVELOPE_SIZES.get((flags >> 1) & 0x07)
+    if flags & 0x10 or envelope_size is None:
+        return None
+    if envelope_size:
+        return struct.unpack_from("<4d" if flags & 0x01 else ">4d", blob, 8)
+    # Without an envelope in the header, the bounds come from the WKB itself
+    minx, miny, maxx, maxy = shapely.bounds(shapely.from_wkb(blob[8:]))
+    return None if math.isnan(minx) else (minx, maxx, miny, maxy)
+
+
+def _register_gpkg_functions(conn: sqlite3.Connection) -> None:
+    """
+    Register the ST_* functions called by the spatial index triggers of the GeoPackage, which GDAL defines on its
+    own connections. Without them, sqlite can't prepare any statement which updates or deletes areas_of_interest.
+    """
+    conn.create_function(
+        "ST_IsEmpty", 1, lambda blob: None if blob is None else int(_gpkg_envelope(blob) is None), deterministic=True
+    )
+    for index, name in enumerate(("ST_MinX", "ST_MaxX", "ST_MinY", "ST_MaxY")):
+        conn.create_function(
+            name,
+            1,
+            lambda blob, index=index: None if (envelope := _gpkg_envelope(blob)) is None else envelope[index],
+            deterministic=True,
+        )
+
+
+def _has_unique_feature_index(conn: sqlite3.Connection) -> bool:
+    """Check whether the feature IDs of each monitor are unique by index in areas_of_interest."""
+    return any(
+        name == "idx_areas_of_interest_monitor_feature" and unique
+        for _, name, unique, *_ in conn.execute("PRAGMA index_list(areas_of_interest)")
+    )
+
+
+# GeoPackage files whose tables were already created or migrated by this process
+_initialized_paths: set[Path] = set()
+
 
 class GeoConfigHandler:
     """
@@ -48,6 +176,12 @@ class GeoConfigHandler:
             "monitored_pixels": pd.Series(dtype="int"),
             "disturbed_pixels": pd.Series(dtype="int"),
         }
+        # Connections are opened lazily and reused for all queries of this handler
+        self._connection: sqlite3.Connection | None = None
+        self._read_connection: sqlite3.Connection | None = None
+        self._connection_lock = threading.Lock()
+        self._write_lock = threading.RLock()
+        self._transaction_depth = 0
         self._init_geopackage()
 
     def _init_geopackage(self) -> None:
@@ -58,14 +192,48 @@ class GeoConfigHandler:
 
             # Create areas_of_interest layer with monitored_pixels column
             aoi_gdf = gpd.GeoDataFrame(self.aoi_schema, geometry=[], crs="EPSG:3857")
-            aoi_gdf.to_file(self.config_file_path, driver="GPKG", layer="areas_of_interest")
+            aoi_gdf.to_file(self.config_file_path, driver="GPKG", layer="areas_of_interest", engine="pyogrio")
+            _initialized_paths.discard(self.config_file_path.resolve())
         else:
             logger.debug("GeoPackage file already exists", extra={"geopackage_path": str(self.config_file_path)})
 
+        # The schema only has to be checked once per file and process
+        resolved_path = self.config_file_path.resolve()
+        if resolved_path in _initialized_paths:
+            return
+
+        # Files which are already on the current schema version don't need any DDL
+        schema_version = self._schema_version()
+        if schema_version == SCHEMA_VERSION:
+            logger.debug("GeoPackage schema is up to date", extra={"schema_version": SCHEMA_VERSION})
+            _initialized_paths.add(resolved_path)
+            return
+
         # Connect to the GeoPackage's SQLite database for non-spatial tables
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        with self._transaction() as conn:
+            self._create_tables(conn.cursor(), schema_version)
+        _initialized_paths.add(resolved_path)
 
+    def _schema_version(self) -> str | None:
+        """Get the schema version stored in the GeoPackage, None if the file has no metadata table yet."""
+        try:
+            result = (
+                self._get_read_connection()
+                .execute("SELECT value FROM metadata WHERE key = 'schema_version'")
+                .fetchone()
+            )
+        except sqlite3.OperationalError:
+            return None
+        return result[0] if result else None
+
+    def _create_tables(self, cursor: sqlite3.Cursor, schema_version: str | None = None) -> None:
+        """
+        Create the non-spatial tables and migrate old schemas.
+
+        Args:
+            cursor: Cursor inside the transaction of the migration
+            schema_version: Schema version the file had before, None for new files and files without metadata
+        """
         # Create monitors table
         cursor.execute("""
         CREATE TABLE IF NOT EXISTS monitors (
@@ -109,7 +277,8 @@ class GeoConfigHandler:
         """)
         logger.debug("Created or verified metadata table")
 
-        # Create monitoring_results table
+        # Create monitoring_results table. Lookups and deletes by monitor_name or (monitor_name, feature_id)
+        # are served by the primary key index, so no separate index is needed.
         cursor.execute("""
         CREATE TABLE IF NOT EXISTS monitoring_results (
             monitor_name TEXT NOT NULL,
@@ -123,9 +292,44 @@ class GeoConfigHandler:
         """)
         logger.debug("Created or verified monitoring_results table")
 
+        # Add the pixel count columns to areas_of_interest layers which were created before they existed
+        cursor.execute("PRAGMA table_info(areas_of_interest)")
+        aoi_columns = [row[1] for row in cursor.fetchall()]
+        if "monitored_pixels" not in aoi_columns:
+            logger.debug("Adding monitored_pixels column to areas_of_interest table")
+            cursor.execute("ALTER TABLE areas_of_interest ADD COLUMN monitored_pixels REAL")
+        if "disturbed_pixels" not in aoi_columns:
+            logger.debug("Adding disturbed_pixels column to areas_of_interest table")
+            cursor.execute("ALTER TABLE areas_of_interest ADD COLUMN disturbed_pixels INTEGER")
+
+        # Up to schema version 4 the metric evalscripts counted every valid pixel once per metric band, since
+        # version 5 they count each pixel once. Halve the old counts so all monitors are comparable
+        if schema_version is not None and int(schema_version) < 5:
+            logger.info("Migrating monitored_pixels to per pixel counts", extra={"schema_version": schema_version})
+            cursor.execute("UPDATE areas_of_interest SET monitored_pixels = monitored_pixels / 2.0")
+
+        # Index the areas_of_interest layer (created by GDAL) for the per-feature updates and per-monitor deletes.
+        # The index is unique, so duplicate feature IDs of a monitor are rejected on insert
+        cursor.execute("PRAGMA index_list(areas_of_interest)")
+        aoi_indexes = {row[1]: row[2] for row in cursor.fetchall()}
+        if not aoi_indexes.get("idx_areas_of_interest_monitor_feature"):
+            cursor.execute("DROP INDEX IF EXISTS idx_areas_of_interest_monitor_feature")
+            try:
+                cursor.execute(f"""
+                CREATE UNIQUE INDEX idx_areas_of_interest_monitor_feature
+                ON areas_of_interest (monitor_name, {FEATURE_ID_COLUMN})
+                """)
+            except sqlite3.IntegrityError:
+                logger.warning("Duplicate feature IDs in areas_of_interest, creating a non-unique index instead")
+                cursor.execute(f"""
+                CREATE INDEX idx_areas_of_interest_monitor_feature
+                ON areas_of_interest (monitor_name, {FEATURE_ID_COLUMN})
+                """)
+        logger.debug("Created or verified areas_of_interest index")
+
         # Migrate backends table to JSON config format if needed
         cursor.execute("PRAGMA table_info(backends)")
-        columns = [row["name"] for row in cursor.fetchall()]
+        columns = [row[1] for row in cursor.fetchall()]
 
         # Check if we need to migrate from old column-based format to JSON
         if "bucket_name" in columns and "config" not in columns:
@@ -133,7 +337,7 @@ class GeoConfigHandler:
 
             # Get existing data
             cursor.execute("SELECT * FROM backends")
-            existing_backends = cursor.fetchall()
+            existing_backends = list(_dict_rows(cursor))
 
             # Drop and recreate table with new schema
             cursor.execute("DROP TABLE backends")
@@ -148,58 +352,155 @@ class GeoConfigHandler:
             """)
 
             # Migrate existing data to JSON format
-            for backend in existing_backends:
-                config_dict = {}
-                for key, value in backend.items():
-                    if key not in ["name", "backend_type"] and value is not None:
-                        config_dict[key] = value
-
-                cursor.execute(
-                    "INSERT INTO backends (name, backend_type, config) VALUES (?, ?, ?)",
-                    (backend["name"], backend["backend_type"], json.dumps(config_dict)),
-                )
+            cursor.executemany(
+                "INSERT INTO backends (name, backend_type, config) VALUES (?, ?, ?)",
+                [
+                    (
+                        backend["name"],
+                        backend["backend_type"],
+                        json.dumps(
+                            {
+                                key: value
+                                for key, value in backend.items()
+                                if key not in ("name", "backend_type") and value is not None
+                            }
+                        ),
+                    )
+                    for backend in existing_backends
+                ],
+            )
 
             logger.info("Migrated backend configurations to JSON format", extra={"n_backends": len(existing_backends)})
 
         # Insert schema version
-        cursor.execute("INSERT OR REPLACE INTO metadata VALUES (?, ?)", ("schema_version", "4"))
-        logger.info("GeoPackage initialization completed with schema version 4")
-
-        conn.commit()
-        conn.close()
+        cursor.execute("INSERT OR REPLACE INTO metadata VALUES (?, ?)", ("schema_version", SCHEMA_VERSION))
+        logger.info("GeoPackage initialization completed", extra={"schema_version": SCHEMA_VERSION})
 
     def _get_connection(self) -> sqlite3.Connection:
-        """Get a connection to the SQLite database underlying the GeoPackage."""
-        conn = sqlite3.connect(str(self.config_file_path))
-        conn.row_factory = self._dict_factory
-        conn.enable_load_extension(True)
-        conn.load_extension("mod_spatialite")
-        # Enable foreign key constraints
-        conn.execute("PRAGMA foreign_keys = ON")
-        logger.debug("Established database connection", extra={"geopackage_path": str(self.config_file_path)})
-        return conn
-
-    @staticmethod
-    def _dict_factory(cursor, row):
-        """Convert SQLite row to dictionary."""
-        d = {}
-        for idx, col in enumerate(cursor.description):
-            d[col[0]] = row[idx]
-        return d
-
-    def _adapt_date(self, date):
-        """Convert date to ISO format for SQLite storage."""
-        return date.isoformat() if date else None
-
-    def _convert_date(self, date_str):
-        """Convert ISO date string from SQLite to datetime.date."""
-        if date_str and isinstance(date_str, bytes):
-            date_str = date_str.decode("utf-8")
-        return datetime.date.fromisoformat(str(date_str)) if date_str else None
+        """Get the connection to the SQLite database underlying the GeoPackage, opening it on first use."""
+        with self._connection_lock:
+            if self._connection is None:
+                conn = sqlite3.connect(
+                    str(self.config_file_path), check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE
+                )
+                # Configure the connection before the first page of the file is read
+                # Enable foreign key constraints
+                conn.execute("PRAGMA foreign_keys = ON")
+                # Keep the rollback journal: GDAL creates and reads the areas_of_interest layer through its own
+                # connection, which doesn't see frames left in a WAL file by this one
+                conn.execute("PRAGMA journal_mode = DELETE")
+                conn.execute("PRAGMA synchronous = NORMAL")
+                conn.execute("PRAGMA temp_store = MEMORY")
+                conn.execute("PRAGMA cache_size = -64000")
+                conn.execute("PRAGMA mmap_size = 268435456")
+                # Writes to areas_of_interest need the functions of its spatial index triggers
+                _register_gpkg_functions(conn)
+                logger.debug("Established database connection", extra={"geopackage_path": str(self.config_file_path)})
+                self._connection = conn
+            return self._connection
+
+    def _get_read_connection(self) -> sqlite3.Connection:
+        """
+        Get a read-only connection to the GeoPackage, opening it on first use.
+
+        Queries which only read go through this connection, so they don't have to wait for the write lock and never
+        see the uncommitted changes of a running transaction.
+        """
+        with self._connection_lock:
+            if self._read_connection is None:
+                uri = f"{self.config_file_path.resolve().as_uri()}?mode=ro"
+                conn = sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+                conn.execute("PRAGMA temp_store = MEMORY")
+                conn.execute("PRAGMA cache_size = -64000")
+                conn.execute("PRAGMA mmap_size = 268435456")
+                logger.debug(
+                    "Established read-only database connection", extra={"geopackage_path": str(self.config_file_path)}
+                )
+                self._read_connection = conn
+            return self._read_connection
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Yield the connection inside a transaction which is committed on success and rolled back on error."""
+        conn = self._get_connection()
+        # Writers are serialized, as the connection is shared between threads
+        with self._write_lock:
+            if self._transaction_depth:
+                # Nested inside another transaction of this thread, which commits or rolls back everything
+                self._transaction_depth += 1
+                try:
+                    yield conn
+                finally:
+                    self._transaction_depth -= 1
+                return
+            self._transaction_depth = 1
+            try:
+                with conn:
+                    # sqlite3 doesn't implicitly begin a transaction before DDL statements, so it is started
+                    # explicitly. Otherwise e.g. a dropped trigger would be committed right away and not restored
+                    # by a rollback. Taking the write lock up front also commits all statements in one go.
+                    if not conn.in_transaction:
+                        conn.execute("BEGIN IMMEDIATE")
+                    yield conn
+            finally:
+                self._transaction_depth = 0
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        Group all writes inside the block into a single transaction, which is committed when the block exits and
+        rolled back if it raises.
+
+        The loaders and existence checks read through a separate read-only connection, so when called inside the
+        block they don't see its pending writes. They see the state before the block until it has been committed.
+
+        Example:
+            with config.batch():
+                config.save_monitor_params(params)
+                config.save_backend_config(params.name, "ProcessAPI", backend_config)
+        """
+        with self._transaction():
+            yield
+
+    def close(self) -> None:
+        """Close the connections to the GeoPackage. They are reopened on the next query."""
+        with self._connection_lock:
+            if self._read_connection is not None:
+                self._read_connection.close()
+                self._read_connection = None
+            if self._connection is not None:
+                # Let sqlite refresh its query planner statistics before closing
+                self._connection.execute("PRAGMA optimize")
+                self._connection.close()
+                self._connection = None
+
+    def __enter__(self) -> "GeoConfigHandler":
+        return self
+
+    def __exit__(
+        self, exc_type: type[BaseException] | None, exc_val: BaseException | None, tb: TracebackType | None
+    ) -> None:
+        self.close()
 
     def save_geometry(self, monitor_name: str, gdf: gpd.GeoDataFrame) -> None:
         """
-        Save geometries to the areas_of_interest table in the GeoPackage.
+        Save geometries to the areas_of_interest table in the GeoPackage, replacing any geometries the monitor
+        already had.
+
+        Args:
+            monitor_name: Name of the monitor to associate with the geometries
+            gdf: GeoDataFrame containing the geometries
+        """
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM areas_of_interest WHERE monitor_name = ?", (monitor_name,))
+            self.append_geometries(monitor_name, gdf)
+
+    def append_geometries(self, monitor_name: str, gdf: gpd.GeoDataFrame) -> None:
+        """
+        Append geometries to the areas_of_interest table in the GeoPackage.
+
+        The features are encoded as GeoPackage geometry blobs and inserted with a single executemany. The spatial
+        index is filled from the same bounds, instead of through its insert trigger.
 
         Args:
             monitor_name: Name of the monitor to associate with the geometries
@@ -214,17 +515,98 @@ class GeoConfigHandler:
             )
             gdf = gdf.to_crs(epsg=3857)
 
-        # Add monitor_name column
-        gdf["monitor_name"] = monitor_name
-
         try:
-            # Column order has to match exactly for appending to work
-            correct_order_gdf = gdf[[*self.aoi_schema.keys(), "geometry"]]
-            correct_order_gdf.to_file(self.config_file_path, driver="GPKG", layer="areas_of_interest", mode="a")
+            geometries = gdf.geometry.to_numpy()
+            bounds = shapely.bounds(geometries).tolist()
+            columns = [column for column in self.aoi_schema if column != "monitor_name"]
+            # Missing values are stored as NULL
+            attributes = gdf[columns].astype(object).where(gdf[columns].notna(), None).itertuples(index=False)
+
+            with self._transaction() as conn:
+                # Duplicate IDs are rejected by the unique index of areas_of_interest. Files which already held
+                # duplicates when the index was created only have a non-unique one, so the IDs are checked here
+                if not _has_unique_feature_index(conn) and not gdf[FEATURE_ID_COLUMN].is_unique:
+                    logger.error(
+                        "Duplicate IDs found in geometry",
+                        extra={"monitor_name": monitor_name, "id_column": FEATURE_ID_COLUMN},
+                    )
+                    raise ValueError("Duplicate ID found")
+                srs_id = conn.execute(
+                    "SELECT srs_id FROM gpkg_geometry_columns WHERE table_name = 'areas_of_interest'"
+                ).fetchone()[0]
+                # Assign the fids explicitly, so the spatial index rows can be written alongside the features
+                last_fid = conn.execute(
+                    """
+                    SELECT MAX(
+                        COALESCE((SELECT MAX(fid) FROM areas_of_interest), 0),
+                        COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'areas_of_interest'), 0)
+                    )
+                    """
+                ).fetchone()[0]
+                fids = range(last_fid + 1, last_fid + 1 + len(gdf))
+
+                # The insert trigger of the spatial index would compute the bounds of every feature again through
+                # the ST_* functions, so it is suspended and the index rows are written directly
+                trigger = conn.execute(
+                    "SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = ?", (_RTREE_INSERT_TRIGGER,)
+                ).fetchone()
+                if trigger is not None:
+                    conn.execute(f'DROP TRIGGER "{_RTREE_INSERT_TRIGGER}"')
+
+                conn.executemany(
+                    f"""
+                    INSERT INTO areas_of_interest (fid, geom, monitor_name, {", ".join(columns)})
+                    VALUES (?, ?, ?, {", ".join(["?"] * len(columns))})
+                    """,
+                    [
+                        (fid, blob, monitor_name, *row)
+                        for fid, blob, row in zip(
+                            fids, _gpkg_geometries(geometries, bounds, srs_id), attributes, strict=True
+                        )
+                    ],
+                )
+
+                # Empty geometries have NaN bounds and are neither indexed nor part of the extent
+                indexed = [
+                    (fid, *fid_bounds)
+                    for fid, fid_bounds in zip(fids, bounds, strict=True)
+                    if not math.isnan(fid_bounds[0])
+                ]
+                if trigger is not None:
+                    conn.executemany(
+                        f'INSERT OR REPLACE INTO "{_RTREE_TABLE}" VALUES (?, ?, ?, ?, ?)',
+                        [(fid, minx, maxx, miny, maxy) for fid, minx, miny, maxx, maxy in indexed],
+                    )
+                    conn.execute(trigger[0])
+
+                if indexed:
+                    # Keep the layer extent GDAL reports in line with the new features
+                    conn.execute(
+                        """
+                        UPDATE gpkg_contents SET
+                            min_x = MIN(COALESCE(min_x, :min_x), :min_x),
+                            min_y = MIN(COALESCE(min_y, :min_y), :min_y),
+                            max_x = MAX(COALESCE(max_x, :max_x), :max_x),
+                            max_y = MAX(COALESCE(max_y, :max_y), :max_y),
+                            last_change = strftime('%Y-%m-%dT%H:%M:%fZ', 'now')
+                        WHERE table_name = 'areas_of_interest'
+                        """,
+                        {
+                            "min_x": min(row[1] for row in indexed),
+                            "min_y": min(row[2] for row in indexed),
+                            "max_x": max(row[3] for row in indexed),
+                            "max_y": max(row[4] for row in indexed),
+                        },
+                    )
             logger.info(
                 "Successfully saved geometry to areas_of_interest",
                 extra={"monitor_name": monitor_name, "total_features": len(gdf)},
             )
+        except sqlite3.IntegrityError as e:
+            logger.error(
+                "Duplicate IDs found in geometry", extra={"monitor_name": monitor_name, "id_column": FEATURE_ID_COLUMN}
+            )
+            raise ValueError("Duplicate ID found") from e
         except Exception as e:
             logger.error("Error saving areas_of_interest", extra={"monitor_name": monitor_name, "error": str(e)})
             raise e
@@ -247,37 +629,35 @@ class GeoConfigHandler:
         # Convert path-like objects to strings
         input_path_str = str(input_path) if isinstance(input_path, Path) else input_path
 
-        # Load the input geometry with GeoPandas
-        gdf = gpd.read_file(input_path_str).to_crs(epsg=3857).rename(columns={id_column: FEATURE_ID_COLUMN})
+        # Load the input geometry with GeoPandas, reading only the ID column besides the geometry
+        gdf = gpd.read_file(input_path_str, columns=[id_column], engine="pyogrio").rename(
+            columns={id_column: FEATURE_ID_COLUMN}
+        )
+
+        # Add WGS84 centroid, projected from the input CRS instead of from the reprojected geometries
+        centroids = shapely.centroid(gdf.geometry.to_crs(epsg=4326).values)
+        # GEOS can't get the coordinates of an empty point, missing centroids give NaN coordinates instead
+        centroids[shapely.is_empty(centroids)] = None
+
+        gdf = gdf.to_crs(epsg=3857)
+        gdf["lat"] = shapely.get_y(centroids)
+        gdf["lng"] = shapely.get_x(centroids)
         logger.debug(
             "Loaded and reprojected geometry file", extra={"monitor_name": monitor_name, "feature_count": len(gdf)}
         )
 
-        # Add WGS84 centroid
-        centroids = gdf.to_crs(epsg=4326).centroid
-        gdf["lat"] = centroids.y
-        gdf["lng"] = centroids.x
-
         # Initialize monitored_pixels column as float64 to ensure REAL type in SQLite
         gdf["monitored_pixels"] = pd.Series(dtype="int")
         gdf["disturbed_pixels"] = pd.Series(dtype="int")
 
-        # Check for any geometries which aren't POLYGONS
-        if not all(gdf.geometry.type == "Polygon"):
+        # Check for any geometries which aren't POLYGONS, comparing the integer type IDs instead of type names
+        if not (shapely.get_type_id(gdf.geometry.values) == shapely.GeometryType.POLYGON).all():
             logger.error(
                 "Invalid geometry types found",
-                extra={"monitor_name": monitor_name, "geometry_types": gdf.geometry.type.unique().tolist()},
+                extra={"monitor_name": monitor_name, "geometry_types": pd.unique(gdf.geom_type.to_numpy()).tolist()},
             )
             raise ValueError("All geometries must be of type POLYGON")
 
-        # Check for uniqueness in the id_column
-        is_unique = gdf[FEATURE_ID_COLUMN].is_unique
-        if not is_unique:
-            logger.error(
-                "Duplicate IDs found in geometry", extra={"monitor_name": monitor_name, "id_column": FEATURE_ID_COLUMN}
-            )
-            raise ValueError("Duplicate ID found")
-
         # Save to areas_of_interest in GeoPackage
         self.save_geometry(monitor_name, gdf)
         logger.info(
@@ -300,48 +680,74 @@ class GeoConfigHandler:
         )
 
         try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-
-            # Ensure the column exists before trying to update
-            cursor.execute("PRAGMA table_info(areas_of_interest)")
-            columns = [row["name"] for row in cursor.fetchall()]
-            if "monitored_pixels" not in columns:
-                logger.debug("Adding monitored_pixels column to areas_of_interest table")
-                cursor.execute("ALTER TABLE areas_of_interest ADD COLUMN monitored_pixels REAL")
+            with self._transaction() as conn:
+                cursor = conn.cursor()
 
-            # Run update
-            cursor.execute(
-                f"""
-                UPDATE areas_of_interest
-                SET monitored_pixels = ?
-                WHERE monitor_name = ? AND {FEATURE_ID_COLUMN} = ?
-                """,
-                (float(monitored_pixels), monitor_name, str(feature_id)),
-            )
-
-            if cursor.rowcount == 0:
-                logger.warning(
-                    "No matching row found for update", extra={"monitor_name": monitor_name, "feature_id": feature_id}
-                )
-            else:
-                logger.info(
-                    "Updated monitored_pixels successfully",
-                    extra={
-                        "monitor_name": monitor_name,
-                        "feature_id": feature_id,
-                        "monitored_pixels": monitored_pixels,
-                    },
+                # Run update
+                cursor.execute(
+                    f"""
+                    UPDATE areas_of_interest
+                    SET monitored_pixels = ?
+                    WHERE monitor_name = ? AND {FEATURE_ID_COLUMN} = ?
+                    """,
+                    (float(monitored_pixels), monitor_name, str(feature_id)),
                 )
 
-            conn.commit()
+                if cursor.rowcount == 0:
+                    logger.warning(
+                        "No matching row found for update",
+                        extra={"monitor_name": monitor_name, "feature_id": feature_id},
+                    )
+                else:
+                    logger.info(
+                        "Updated monitored_pixels successfully",
+                        extra={
+                            "monitor_name": monitor_name,
+                            "feature_id": feature_id,
+                            "monitored_pixels": monitored_pixels,
+                        },
+                    )
         except Exception as e:
             logger.error(
                 "SQL error updating monitored_pixels",
                 extra={"monitor_name": monitor_name, "feature_id": feature_id, "error": str(e)},
             )
-        finally:
-            conn.close()
+
+    def update_many_monitored_pixels(self, monitor_name: str, updates: Iterable[tuple[str, int]]) -> None:
+        """
+        Update the monitored_pixels counts of several features of a monitor in a single transaction.
+
+        Args:
+            monitor_name: Name of the monitor
+            updates: Iterable of (feature_id, monitored_pixels) tuples
+        """
+        rows = [(float(monitored_pixels), monitor_name, str(feature_id)) for feature_id, monitored_pixels in updates]
+        logger.debug("Updating monitored pixels", extra={"monitor_name": monitor_name, "feature_count": len(rows)})
+
+        try:
+            with self._transaction() as conn:
+                cursor = conn.cursor()
+                cursor.executemany(
+                    f"""
+                    UPDATE areas_of_interest
+                    SET monitored_pixels = ?
+                    WHERE monitor_name = ? AND {FEATURE_ID_COLUMN} = ?
+                    """,
+                    rows,
+                )
+
+                if cursor.rowcount < len(rows):
+                    logger.warning(
+                        "No matching row found for some updates",
+                        extra={"monitor_name": monitor_name, "missing_rows": len(rows) - cursor.rowcount},
+                    )
+                else:
+                    logger.info(
+                        "Updated monitored_pixels successfully",
+                        extra={"monitor_name": monitor_name, "feature_count": len(rows)},
+                    )
+        except Exception as e:
+            logger.error("SQL error updating monitored_pixels", extra={"monitor_name": monitor_name, "error": str(e)})
 
     def load_geometry(self, monitor_name: str | None = None) -> gpd.GeoDataFrame:
         """
@@ -356,16 +762,23 @@ class GeoConfigHandler:
         logger.debug("Loading geometry", extra={"monitor_name": monitor_name})
 
         try:
-            # Load the areas_of_interest layer and filter for the monitor name
-            aoi = gpd.read_file(self.config_file_path, layer="areas_of_interest")
-            if aoi.empty:
-                logger.warning("No geometries found in areas_of_interest table")
-                raise KeyError(f"No geometries found for monitor '{monitor_name}'")
             if monitor_name is None:
+                aoi = gpd.read_file(self.config_file_path, layer="areas_of_interest", engine="pyogrio")
+                if aoi.empty:
+                    logger.warning("No geometries found in areas_of_interest table")
+                    raise KeyError(f"No geometries found for monitor '{monitor_name}'")
                 logger.debug("Returning all geometries", extra={"total_count": len(aoi)})
                 return aoi
 
-            filtered_aoi = aoi[aoi["monitor_name"] == monitor_name]
+            # Let GDAL filter for the monitor name, so only its features are read. OGR SQL has no parameters,
+            # so quotes in the name are escaped
+            escaped_name = monitor_name.replace("'", "''")
+            filtered_aoi = gpd.read_file(
+                self.config_file_path,
+                layer="areas_of_interest",
+                where=f"monitor_name = '{escaped_name}'",
+                engine="pyogrio",
+            )
 
             if filtered_aoi.empty:
                 logger.warning("No geometries found for monitor", extra={"monitor_name": monitor_name})
@@ -389,36 +802,27 @@ class GeoConfigHandler:
         """
         logger.info("Saving monitor parameters", extra={"monitor_name": params.name})
 
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        # Convert to dict and ensure all values are compatible
-        params_dict = asdict(params)
+        with self._transaction() as conn:
+            conn.execute(_SAVE_MONITOR_SQL, _monitor_row(params))
 
-        # Remove geometry_path from params_dict as it's now stored in the areas_of_interest table
-        params_dict.pop("geometry_path", None)
-        name = params_dict.pop("name")
+        logger.debug(
+            "Monitor parameters saved successfully", extra={"monitor_name": params.name, "fields": _MONITOR_COLUMNS}
+        )
 
-        # Handle dates
-        for date_field in ["monitoring_start", "last_monitored"]:
-            if isinstance(params_dict[date_field], datetime.date):
-                params_dict[date_field] = params_dict[date_field].isoformat()
+    def save_many_monitor_params(self, params: Iterable[MonitorParameters]) -> None:
+        """
+        Save the parameters of several monitors to the GeoPackage in a single transaction.
 
-        fields = list(params_dict.keys())
-        placeholders = ", ".join(["?"] * len(fields))
-        set_clause = ", ".join([f"{field} = ?" for field in fields])
+        Args:
+            params: Iterable of monitor parameters
+        """
+        rows = [_monitor_row(monitor_params) for monitor_params in params]
+        logger.info("Saving monitor parameters", extra={"monitor_count": len(rows)})
 
-        cursor.execute(
-            f"""
-            INSERT INTO monitors (name, {", ".join(fields)})
-            VALUES (?, {placeholders})
-            ON CONFLICT(name) DO UPDATE SET {set_clause}
-            """,
-            [name] + [params_dict[field] for field in fields] + [params_dict[field] for field in fields],
-        )
+        with self._transaction() as conn:
+            conn.executemany(_SAVE_MONITOR_SQL, rows)
 
-        logger.debug("Monitor parameters saved successfully", extra={"monitor_name": name, "fields": fields})
-        conn.commit()
-        conn.close()
+        logger.debug("Monitor parameters saved successfully", extra={"monitor_count": len(rows)})
 
     def save_backend_config(self, monitor_name: str, backend_type: str, config: dict[str, Any]) -> None:
         """
@@ -431,27 +835,31 @@ class GeoConfigHandler:
         """
         logger.info("Saving backend configuration", extra={"monitor_name": monitor_name, "backend_type": backend_type})
 
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
         # Serialize config as JSON
         config_json = json.dumps(config)
 
-        cursor.execute(
-            """
-            INSERT INTO backends (name, backend_type, config)
-            VALUES (?, ?, ?)
-            ON CONFLICT(name, backend_type) DO UPDATE SET config = ?
-            """,
-            [monitor_name, backend_type, config_json, config_json],
-        )
+        with self._transaction() as conn:
+            conn.execute(_SAVE_BACKEND_SQL, [monitor_name, backend_type, config_json])
 
         logger.debug(
             "Backend configuration saved successfully",
             extra={"monitor_name": monitor_name, "backend_type": backend_type, "config_fields": list(config.keys())},
         )
-        conn.commit()
-        conn.close()
+
+    def save_many_backend_configs(self, configs: Iterable[tuple[str, str, dict[str, Any]]]) -> None:
+        """
+        Save several backend configurations to the GeoPackage in a single transaction.
+
+        Args:
+            configs: Iterable of (monitor_name, backend_type, config) tuples
+        """
+        rows = [(monitor_name, backend_type, json.dumps(config)) for monitor_name, backend_type, config in configs]
+        logger.info("Saving backend configurations", extra={"backend_count": len(rows)})
+
+        with self._transaction() as conn:
+            conn.executemany(_SAVE_BACKEND_SQL, rows)
+
+        logger.debug("Backend configurations saved successfully", extra={"backend_count": len(rows)})
 
     def save_monitoring_results(self, monitor_name: str, results: dict[str, dict[str, Any]]) -> None:
         """
@@ -463,55 +871,61 @@ class GeoConfigHandler:
         """
         logger.info("Saving monitoring results", extra={"monitor_name": monitor_name, "feature_count": len(results)})
 
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
         # Prepare data for bulk insert
         data_to_insert = []
-        sum_disturbed = 0
+        # Features whose disturbed pixel totals in areas_of_interest have to be refreshed
+        feature_ids: list[str] = []
         for feature_id, feature_data in results.items():
+            # Feature IDs are stored as text, convert them once per feature instead of once per row
+            feature_id_str = feature_id if isinstance(feature_id, str) else str(feature_id)
+            feature_ids.append(feature_id_str)
             for date_str, values in feature_data.get("monitorResults", {}).items():
+                # Dates come as YYMMDD strings, which only have to be rearranged into ISO format
+                iso_date = f"20{date_str[:2]}-{date_str[2:4]}-{date_str[4:6]}"
                 # Add the record to our insertion list
                 data_to_insert.append(
                     (
                         monitor_name,
-                        str(feature_id),
-                        datetime.datetime.strptime(date_str, "%y%m%d").date().isoformat(),
+                        feature_id_str,
+                        iso_date,
                         values["monitoredPixels"],
                         values["disturbedPixels"],
                     )
                 )
-                sum_disturbed += values["disturbedPixels"]
 
         # Only proceed if there's data to insert
-        if data_to_insert:
-            # Use executemany for better performance
-            cursor.executemany(
-                """
-                INSERT OR IGNORE INTO monitoring_results
-                (monitor_name, feature_id, date, monitored_pixels, disturbed_pixels)
-                VALUES (?, ?, ?, ?, ?)
-                """,
-                data_to_insert,
-            )
-            logger.debug(
-                "Monitoring results saved successfully",
-                extra={"monitor_name": monitor_name, "records_inserted": len(data_to_insert)},
-            )
-            # Run update
-            cursor.execute(
+        if not data_to_insert:
+            logger.debug("No monitoring results to save", extra={"monitor_name": monitor_name})
+            return
+
+        with self._transaction() as conn:
+            # Insert in batches to bound the memory sqlite needs per statement
+            for start in range(0, len(data_to_insert), INSERT_BATCH_SIZE):
+                conn.executemany(
+                    """
+                    INSERT OR IGNORE INTO monitoring_results
+                    (monitor_name, feature_id, date, monitored_pixels, disturbed_pixels)
+                    VALUES (?, ?, ?, ?, ?)
+                    """,
+                    data_to_insert[start : start + INSERT_BATCH_SIZE],
+                )
+            # Recompute the disturbed pixel totals of the touched features from the stored results. Rows which were
+            # ignored as already saved are therefore not counted twice
+            conn.executemany(
                 f"""
                 UPDATE areas_of_interest
-                SET disturbed_pixels = disturbed_pixels + ?
+                SET disturbed_pixels = (
+                    SELECT COALESCE(SUM(disturbed_pixels), 0) FROM monitoring_results
+                    WHERE monitor_name = ? AND feature_id = ?
+                )
                 WHERE monitor_name = ? AND {FEATURE_ID_COLUMN} = ?
                 """,
-                (sum_disturbed, monitor_name, str(feature_id)),
+                [(monitor_name, feature_id, monitor_name, feature_id) for feature_id in feature_ids],
             )
-        else:
-            logger.debug("No monitoring results to save", extra={"monitor_name": monitor_name})
-
-        conn.commit()
-        conn.close()
+        logger.debug(
+            "Monitoring results saved successfully",
+            extra={"monitor_name": monitor_name, "records_inserted": len(data_to_insert)},
+        )
 
     def load_monitoring_results(self, monitor_name: str, feature_id: str | None = None) -> dict[str, dict[str, int]]:
         """
@@ -526,8 +940,7 @@ class GeoConfigHandler:
         """
         logger.debug("Loading monitoring results", extra={"monitor_name": monitor_name, "feature_id": feature_id})
 
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        cursor = self._get_read_connection().cursor()
 
         if feature_id:
             cursor.execute(
@@ -546,30 +959,30 @@ class GeoConfigHandler:
                 (monitor_name,),
             )
 
-        results = cursor.fetchall()
-        conn.close()
-
-        # Organize results into the expected structure
-        structured_results = {}
-        for row in results:
-            feature_id = row.pop("feature_id")
-            date_str = row.pop("date")
-
-            if feature_id not in structured_results:
-                structured_results[feature_id] = {}
-
+        # Organize results into the expected structure, streaming rows from the cursor
+        structured_results: defaultdict[str, dict] = defaultdict(dict)
+        # Features share their acquisition dates, so every date string is only converted once
+        dates: dict[str, datetime.date | None] = {}
+        total_records = 0
+        for row_feature_id, date_str, monitored_pixels, disturbed_pixels in cursor:
             # Convert date string back to datetime.date
-            date = datetime.date.fromisoformat(date_str) if date_str else None
-            structured_results[feature_id][date] = row
+            date = dates.get(date_str)
+            if date is None:
+                date = dates[date_str] = datetime.date.fromisoformat(date_str) if date_str else None
+            structured_results[row_feature_id][date] = {
+                "monitored_pixels": monitored_pixels,
+                "disturbed_pixels": disturbed_pixels,
+            }
+            total_records += 1
 
         logger.debug(
             "Monitoring results loaded successfully",
             extra={
                 "monitor_name": monitor_name,
-                "total_records": len(results),
+                "total_records": total_records,
             },
         )
-        return structured_results
+        return dict(structured_results)
 
     def load_monitor_params(self, name: str) -> dict[str, Any]:
         """
@@ -583,12 +996,9 @@ class GeoConfigHandler:
         """
         logger.debug("Loading monitor parameters", extra={"monitor_name": name})
 
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
+        cursor = self._get_read_connection().cursor()
         cursor.execute("SELECT * FROM monitors WHERE name = ?", (name,))
-        result = cursor.fetchone()
-        conn.close()
+        result = next(_dict_rows(cursor), None)
 
         if not result:
             logger.error("Monitor not found in database", extra={"monitor_name": name})
@@ -619,19 +1029,16 @@ class GeoConfigHandler:
         """
         logger.debug("Loading backend configuration", extra={"monitor_name": name, "backend_type": backend_type})
 
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
+        cursor = self._get_read_connection().cursor()
         cursor.execute("SELECT config FROM backends WHERE name = ? AND backend_type = ?", (name, backend_type))
         result = cursor.fetchone()
-        conn.close()
 
         if not result:
             logger.error("Backend configuration not found", extra={"monitor_name": name, "backend_type": backend_type})
             raise KeyError(f"Backend configuration for monitor '{name}' with type {backend_type} not found")
 
         # Deserialize JSON config
-        config = json.loads(result["config"])
+        config = json.loads(result[0])
 
         logger.debug(
             "Backend configuration loaded successfully", extra={"monitor_name": name, "backend_type": backend_type}
@@ -647,14 +1054,9 @@ class GeoConfigHandler:
         """
         logger.debug("Loading all monitor names")
 
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
+        cursor = self._get_read_connection().cursor()
         cursor.execute("SELECT name FROM monitors")
-        results = cursor.fetchall()
-        conn.close()
-
-        monitor_names = [row["name"] for row in results]
+        monitor_names = [row[0] for row in cursor.fetchall()]
         logger.debug("All monitor names loaded", extra={"monitor_count": len(monitor_names)})
         return monitor_names
 
@@ -670,14 +1072,9 @@ class GeoConfigHandler:
         """
         logger.debug("Checking if monitor exists", extra={"monitor_name": name})
 
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("SELECT 1 FROM monitors WHERE name = ?", (name,))
-        result = cursor.fetchone()
-        conn.close()
-
-        exists = result is not None
+        cursor = self._get_read_connection().cursor()
+        cursor.execute("SELECT EXISTS(SELECT 1 FROM monitors WHERE name = ?)", (name,))
+        exists = bool(cursor.fetchone()[0])
         logger.debug("Monitor existence check completed", extra={"monitor_name": name, "exists": exists})
         return exists
 
@@ -696,20 +1093,21 @@ class GeoConfigHandler:
             "Checking monitor and backend existence", extra={"monitor_name": name, "backend_type": backend_type}
         )
 
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        cursor = self._get_read_connection().cursor()
 
-        # Check if monitor exists
-        cursor.execute("SELECT state FROM monitors WHERE name = ?", (name,))
-        monitor_result = cursor.fetchone()
-        monitor_exists = monitor_result is not None
-        is_initialized = monitor_result["state"] == "INITIALIZED" if monitor_exists else False
-
-        # Check if backend exists
-        cursor.execute("SELECT 1 FROM backends WHERE name = ? AND backend_type = ?", (name, backend_type))
-        backend_exists = cursor.fetchone() is not None
-
-        conn.close()
+        # Check both in one query, state is NULL if the monitor doesn't exist
+        cursor.execute(
+            """
+            SELECT
+                (SELECT state FROM monitors WHERE name = ?) AS state,
+                EXISTS(SELECT 1 FROM backends WHERE name = ? AND backend_type = ?) AS has_backend
+            """,
+            (name, name, backend_type),
+        )
+        state, has_backend = cursor.fetchone()
+        monitor_exists = state is not None
+        is_initialized = state == "INITIALIZED"
+        backend_exists = bool(has_backend)
 
         logger.debug(
             "Monitor and backend existence check completed",
@@ -732,38 +1130,31 @@ class GeoConfigHandler:
         """
         logger.info("Deleting monitor", extra={"monitor_name": name})
 
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        with self._transaction() as conn:
+            cursor = conn.cursor()
 
-        # Delete monitor (cascade will delete associated backends)
-        cursor.execute("DELETE FROM monitors WHERE name = ?", (name,))
-        deleted_rows = cursor.rowcount
+            # Delete monitor (cascade will delete associated backends)
+            cursor.execute("DELETE FROM monitors WHERE name = ?", (name,))
+            deleted_rows = cursor.rowcount
 
-        conn.commit()
-        conn.close()
+            # Delete only the geometries of this monitor instead of rewriting the whole layer
+            cursor.execute("DELETE FROM areas_of_interest WHERE monitor_name = ?", (name,))
+            deleted_geometries = cursor.rowcount
 
-        # Delete the geometries associated with this monitor from areas_of_interest
-        try:
-            # Load existing areas_of_interest
-            aoi = gpd.read_file(self.config_file_path, layer="areas_of_interest")
-
-            # Filter out geometries for this monitor
-            if not aoi.empty and name in aoi["monitor_name"].values:
-                filtered_aoi = aoi[aoi["monitor_name"] != name]
-
-                # Save back to GeoPackage
-                filtered_aoi.to_file(self.config_file_path, driver="GPKG", layer="areas_of_interest")
-                logger.info(
-                    "Monitor and associated geometries deleted successfully",
-                    extra={"monitor_name": name, "deleted_monitor_rows": deleted_rows},
-                )
-            else:
-                logger.info(
-                    "Monitor deleted (no associated geometries found)",
-                    extra={"monitor_name": name, "deleted_monitor_rows": deleted_rows},
-                )
-        except Exception as e:
-            logger.error("Error deleting geometries", extra={"monitor_name": name, "error": str(e)})
+        if deleted_geometries:
+            logger.info(
+                "Monitor and associated geometries deleted successfully",
+                extra={
+                    "monitor_name": name,
+                    "deleted_monitor_rows": deleted_rows,
+                    "deleted_geometries": deleted_geometries,
+                },
+            )
+        else:
+            logger.info(
+                "Monitor deleted (no associated geometries found)",
+                extra={"monitor_name": name, "deleted_monitor_rows": deleted_rows},
+            )
 
     def delete_monitoring_results(self, monitor_name: str, feature_id: str | None = None) -> None:
         """
@@ -775,20 +1166,18 @@ class GeoConfigHandler:
         """
         logger.info("Deleting monitoring results", extra={"monitor_name": monitor_name, "feature_id": feature_id})
 
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        with self._transaction() as conn:
+            cursor = conn.cursor()
 
-        if feature_id:
-            cursor.execute(
-                "DELETE FROM monitoring_results WHERE monitor_name = ? AND feature_id = ?",
-                (monitor_name, str(feature_id)),
-            )
-        else:
-            cursor.execute("DELETE FROM monitoring_results WHERE monitor_name = ?", (monitor_name,))
+            if feature_id:
+                cursor.execute(
+                    "DELETE FROM monitoring_results WHERE monitor_name = ? AND feature_id = ?",
+                    (monitor_name, str(feature_id)),
+                )
+            else:
+                cursor.execute("DELETE FROM monitoring_results WHERE monitor_name = ?", (monitor_name,))
 
-        deleted_rows = cursor.rowcount
-        conn.commit()
-        conn.close()
+            deleted_rows = cursor.rowcount
 
         logger.info(
             "Monitoring results deleted successfully",
@@ -805,14 +1194,11 @@ class GeoConfigHandler:
         """
         logger.info("Updating monitor state", extra={"monitor_name": name, "new_state": state})
 
-        conn = self._get_connection()
-        cursor = conn.cursor()
-
-        cursor.execute("UPDATE monitors SET state = ? WHERE name = ?", (state, name))
-        updated_rows = cursor.rowcount
+        with self._transaction() as conn:
+            cursor = conn.cursor()
 
-        conn.commit()
-        conn.close()
+            cursor.execute("UPDATE monitors SET state = ? WHERE name = ?", (state, name))
+            updated_rows = cursor.rowcount
 
         if updated_rows > 0:
             logger.debug("Monitor state updated successfully", extra={"monitor_name": name, "new_state": state})
@@ -824,39 +1210,35 @@ class GeoConfigHandler:
         Load all configuration from the database in a format compatible with the old TOML format.
         This is for backward compatibility during migration.
         """
-        # Get all monitors
-        monitors = []
-        for name in self.load_all_monitors():
-            monitor_data = self.load_monitor_params(name)
-            monitor_data["name"] = name
-            monitors.append(monitor_data)
+        conn = self._get_read_connection()
 
         # Build the config dictionary
         config = {}
 
         # Add monitor configurations
-        for monitor in monitors:
+        for monitor in _dict_rows(conn.execute("SELECT * FROM monitors")):
             name = monitor.pop("name")
+            # Convert date strings to datetime.date objects
+            for date_field in ["monitoring_start", "last_monitored"]:
+                if monitor.get(date_field):
+                    monitor[date_field] = datetime.date.fromisoformat(monitor[date_field])
+            monitor["geometry_path"] = name
             config[name] = monitor
 
-            # Load backends for this monitor
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            cursor.execute("SELECT * FROM backends WHERE name = ?", (name,))
-            backends = cursor.fetchall()
-            conn.close()
-
-            # Add backend configurations
-            for backend in backends:
-                backend_type = backend.pop("backend_type")
-                backend.pop("name")
-                config[f"{name}.{backend_type}"] = backend
+        # Add backend configurations of all monitors at once
+        for backend in _dict_rows(conn.execute("SELECT * FROM backends")):
+            backend_type = backend.pop("backend_type")
+            name = backend.pop("name")
+            config[f"{name}.{backend_type}"] = backend
 
         return config
 
 
 # Default instance for backward compatibility
 _default_config_handler = None
+# Handlers for custom config files, keyed by the resolved path of the GeoPackage
+_config_handlers: dict[Path, GeoConfigHandler] = {}
+_config_handlers_lock = threading.Lock()
 
 
 def get_geo_config(config_file_path: Path | str | None = None) -> GeoConfigHandler:
@@ -866,6 +1248,8 @@ def get_geo_config(config_file_path: Path | str | None = None) -> GeoConfigHandl
     Args:
         config_file_path: Optional custom path for the GeoPackage configuration file.
                          If None, uses default configuration or returns the default instance.
+                         Handlers for custom paths are cached as well, so every call with the
+                         same file returns the same instance and reuses its connections.
 
     Returns:
         GeoConfigHandler instance
@@ -876,9 +1260,27 @@ def get_geo_config(config_file_path: Path | str | None = None) -> GeoConfigHandl
         # Return cached default instance if available
         if _default_config_handler is None:
             _default_config_handler = GeoConfigHandler()
+            # The default handler lives as long as the process, close its cached connections on exit
+            atexit.register(_default_config_handler.close)
         return _default_config_handler
-    return GeoConfigHandler(config_file_path)
-
 
-# Global instance for backward compatibility
-geo_config = get_geo_config()
+    resolved_path = Path(config_file_path).resolve()
+    with _config_handlers_lock:
+        handler = _config_handlers.get(resolved_path)
+        # A handler whose file was removed in the meantime is replaced to recreate the GeoPackage
+        if handler is None or not resolved_path.exists():
+            if handler is not None:
+                handler.close()
+                atexit.unregister(handler.close)
+            handler = GeoConfigHandler(config_file_path)
+            _config_handlers[resolved_path] = handler
+            atexit.register(handler.close)
+        return handler
+
+
+def __getattr__(name: str) -> Any:
+    """Create the global geo_config instance on first access instead of when the module is imported."""
+    # Global instance for backward compatibility
+    if name == "geo_config":
+        return get_geo_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,5 +1,5 @@
 import datetime
-from dataclasses import asdict, dataclass
+from dataclasses import dataclass, fields
 from os import PathLike
 from typing import Any, Literal
 
@@ -8,7 +8,7 @@ from .constants import EndpointTypes
 datasource_ids = {"S2L2A": "sentinel-2-l2a"}
 
 
-@dataclass
+@dataclass(slots=True)
 class MonitorParameters:
     name: str
     monitoring_start: datetime.date
@@ -55,7 +55,8 @@ class MonitorParameters:
         """
         Convert the parameters to a dictionary for database storage.
         """
-        data = asdict(self)
+        # All fields are flat values, so they are read directly instead of through the recursive asdict
+        data = {field.name: getattr(self, field.name) for field in fields(self)}
         # Ensure PathLike objects are converted to strings
         if isinstance(data["geometry_path"], PathLike):
             data["geometry_path"] = str(data["geometry_path"])
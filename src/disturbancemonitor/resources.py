@@ -1,25 +1,67 @@
 import base64
 import datetime
+import functools
+import hashlib
 import json
 import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import suppress
 from io import BytesIO
+from operator import methodcaller
 from pathlib import Path
-from time import sleep
 from types import TracebackType
 from typing import Any, Literal
+from urllib.parse import quote, urlencode
 
-import boto3
-import boto3.session
-import s3fs
-import toml
-from authlib.integrations.requests_client import OAuth2Session
-from botocore.exceptions import ClientError
-from requests import Response
+import tomllib
+from requests import Response, Session
+from requests.adapters import HTTPAdapter
 from requests.exceptions import HTTPError
 
 from .constants import DATA_PATH
 
+# Seconds before the expiry of an access token at which it is already refreshed
+TOKEN_EXPIRY_MARGIN = 30
+
+# Seconds between status requests while waiting for a tile ingestion, growing from the first to the last value
+INGESTION_POLL_INITIAL = 0.5
+INGESTION_POLL_MAX = 5.0
+# Number of tile ingestions awaited at the same time
+INGESTION_MAX_WORKERS = 8
+
+# Number of connections kept open to each Sentinel Hub host
+SH_POOL_SIZE = 32
+
+# Access tokens are kept here between processes, so a new SHClient can reuse a token which is still valid
+TOKEN_CACHE_PATH = Path().home() / ".cache" / "disturbancemonitor"
+
+
+@functools.lru_cache(maxsize=4)
+def _load_sh_config(path: Path, mtime: float) -> dict[str, Any]:  # noqa: ARG001
+    """
+    Parse the Sentinel Hub configuration file. The modification time is only part of the cache key, so edits to the
+    file are picked up.
+    """
+    with open(path, "rb") as configfile:
+        return tomllib.load(configfile)
+
+
+@functools.lru_cache(maxsize=8)
+def _s3_client(profile: str | None) -> tuple[Any, Any]:
+    """
+    Get a boto3 session and S3 client for an AWS profile. They are shared by all S3 resources with the same
+    profile, so the service model is loaded and the connection pool is set up only once.
+    """
+    import boto3.session
+    from botocore.config import Config
+
+    session = boto3.session.Session(profile_name=profile)
+    return session, session.client("s3", config=Config(max_pool_connections=32))
+
 
 class Resource:
     def delete(self) -> None:
@@ -45,9 +87,11 @@ class ResourceManager:
             print(f"Exception occurred: {exc_val}. \nRolling back resources.")
             if self.on_failure_callback:
                 self.on_failure_callback()
-            for resource in reversed(self.resources):
-                if self.rollback:
-                    resource.delete()
+            if self.rollback and self.resources:
+                # The resources are separate remote objects, so they are deleted concurrently
+                with ThreadPoolExecutor(max_workers=len(self.resources)) as executor:
+                    # Consume the results, so errors while deleting are raised as before
+                    list(executor.map(methodcaller("delete"), reversed(self.resources)))
         return False  # Propagate the exception
 
 
@@ -64,25 +108,49 @@ class S3(Resource):
         self.bucket_name = bucket_name
         self.folder_name = folder_name
         self.root = f"s3://{self.bucket_name}/{self.folder_name}"
+        # boto3 and s3fs take long to import, so they are only loaded once S3 is actually used
+        import s3fs
+        from boto3.s3.transfer import TransferConfig
+
+        # s3fs reuses file system instances with the same arguments by itself
         self.s3fs = s3fs.S3FileSystem(anon=False, profile=profile)
-        self.session = boto3.session.Session(profile_name=profile)
-        self.client = self.session.client("s3")
+        self.session, self.client = _s3_client(profile)
+        self._transfer_config = TransferConfig(multipart_threshold=8 * 1024 * 1024, use_threads=True, max_concurrency=8)
+        # Bucket policy as last read or written by this instance. It assumes this instance is the only writer of
+        # the policy while it exists, changes made by others in the meantime are neither seen nor kept
+        self._policy: dict | None = None
 
     def update_policy(self, new_statements: list) -> None:
-        # Get bucket policy
-        try:
-            old_policy = json.loads(self.client.get_bucket_policy(Bucket=self.bucket_name)["Policy"])
-        except self.client.exceptions.from_code("NoSuchBucketPolicy"):
-            old_policy = {"Version": "2012-10-17", "Statement": []}
+        """
+        Add statements to the bucket policy which it doesn't contain yet, matched by their Sid. Existing statements
+        are kept, and the policy isn't written at all if nothing is missing.
+
+        The policy is only read on the first call of each instance, which assumes no one else changes the bucket
+        policy in between. Use a new instance to pick up changes made out-of-band.
+
+        Args:
+            new_statements: Policy statements, each with a Sid
+        """
+        # Get bucket policy, only once per instance
+        if self._policy is None:
+            try:
+                self._policy = json.loads(self.client.get_bucket_policy(Bucket=self.bucket_name)["Policy"])
+            except self.client.exceptions.from_code("NoSuchBucketPolicy"):
+                self._policy = {"Version": "2012-10-17", "Statement": []}
         # Check if there's already a statement with that name
-        available_statements = {statement["Sid"] for statement in old_policy["Statement"]}
-        for new_statement in new_statements:
-            if new_statement["Sid"] not in available_statements:
-                old_policy["Statement"].append(new_statement)
-        # Convert the policy from JSON dict to string
-        new_policy = json.dumps(old_policy)
-        # Set the new policy
-        self.client.put_bucket_policy(Bucket=self.bucket_name, Policy=new_policy)
+        available_statements = {statement["Sid"] for statement in self._policy["Statement"]}
+        # Statements are keyed by their Sid, so a statement passed twice is only added once
+        wanted_statements = {statement["Sid"]: statement for statement in new_statements}
+        missing_statements = [
+            statement for sid, statement in wanted_statements.items() if sid not in available_statements
+        ]
+        # Nothing to change, skip the request
+        if not missing_statements:
+            return
+        new_policy = {**self._policy, "Statement": self._policy["Statement"] + missing_statements}
+        # Set the new policy, converted from JSON dict to string
+        self.client.put_bucket_policy(Bucket=self.bucket_name, Policy=json.dumps(new_policy))
+        self._policy = new_policy
 
     def create_bucket(self, bucket_location: dict | None) -> None:
         with suppress(self.client.exceptions.BucketAlreadyOwnedByYou):
@@ -92,13 +160,19 @@ class S3(Resource):
                 self.client.create_bucket(Bucket=self.bucket_name, CreateBucketConfiguration=bucket_location)
 
     def write_binary(self, filename: str, binary: BytesIO) -> None:
-        with self.s3fs.open(filename, "wb") as f:
-            f.write(binary.getvalue())
+        prefix = f"s3://{self.bucket_name}/"
+        if not filename.startswith(prefix):
+            raise ValueError(f"{filename} is not in the bucket {self.bucket_name}")
+        key = filename.removeprefix(prefix)
+        binary.seek(0)
+        self.client.upload_fileobj(binary, self.bucket_name, key, Config=self._transfer_config)
 
     def delete(self) -> None:
         """
         Tries to delete the folder and the bucket, if the bucket is empty.
         """
+        from botocore.exceptions import ClientError
+
         with suppress(FileNotFoundError):
             self.s3fs.delete(f"s3://{self.bucket_name}/{self.folder_name}", recursive=True)
         # try to delete the bucket if its empty
@@ -118,14 +192,66 @@ class SHClient:
         Args:
             profile (str): The profile name to use for retrieving the client ID and secret.
         """
+        from authlib.integrations.requests_client import OAuth2Session
+
         if os.environ.get("SH_CLIENT_ID") is not None and os.environ.get("SH_CLIENT_SECRET") is not None:
-            self.client = OAuth2Session(os.environ["SH_CLIENT_ID"], os.environ["SH_CLIENT_SECRET"])
+            client_id, client_secret = os.environ["SH_CLIENT_ID"], os.environ["SH_CLIENT_SECRET"]
         else:
-            with open(Path().home() / ".config" / "sentinelhub" / "config.toml") as configfile:
-                sh_config = toml.load(configfile)[profile]
-            self.client = OAuth2Session(sh_config["sh_client_id"], sh_config["sh_client_secret"])
+            config_path = Path().home() / ".config" / "sentinelhub" / "config.toml"
+            sh_config = _load_sh_config(config_path, config_path.stat().st_mtime)[profile]
+            client_id, client_secret = sh_config["sh_client_id"], sh_config["sh_client_secret"]
+        # The OAuth2 session only fetches tokens, requests go through a plain session with the token as header,
+        # which skips authlib's per-request token checks
+        self.client = OAuth2Session(client_id, client_secret)
+        self._session = Session()
+        # Keep enough connections per host open for concurrent requests, e.g. while awaiting tile ingestions
+        adapter = HTTPAdapter(pool_connections=SH_POOL_SIZE, pool_maxsize=SH_POOL_SIZE)
+        self._session.mount("https://", adapter)
         self.auth_url = auth_url
+        self._token_lock = threading.Lock()
+        # One cached token per client and authentication server, the file name doesn't reveal the client ID
+        cache_key = hashlib.sha256(f"{auth_url}|{client_id}".encode()).hexdigest()
+        self._token_cache = TOKEN_CACHE_PATH / f"token-{cache_key}.json"
+        if not self._load_cached_token():
+            self._fetch_token()
+
+    def _fetch_token(self) -> None:
+        """Fetch a new access token and remember when it has to be refreshed."""
         self.client.fetch_token(self.auth_url)
+        expires_at = self.client.token.get("expires_at")
+        self._refresh_at = float("inf") if expires_at is None else expires_at - TOKEN_EXPIRY_MARGIN
+        self._session.headers["Authorization"] = f"Bearer {self.client.token['access_token']}"
+        self._save_cached_token()
+
+    def _load_cached_token(self) -> bool:
+        """Use the token cached by an earlier client, if it is still valid. Returns whether a token was loaded."""
+        try:
+            token = json.loads(self._token_cache.read_text())
+            expires_at = float(token["expires_at"])
+        except (OSError, ValueError, TypeError, KeyError):
+            return False
+        if expires_at - TOKEN_EXPIRY_MARGIN <= time.time():
+            return False
+        self.client.token = token
+        self._refresh_at = expires_at - TOKEN_EXPIRY_MARGIN
+        self._session.headers["Authorization"] = f"Bearer {self.client.token['access_token']}"
+        return True
+
+    def _save_cached_token(self) -> None:
+        """Write the current token to the cache, readable only by the user. Failing to cache isn't an error."""
+        if self.client.token.get("expires_at") is None:
+            return
+        with suppress(OSError):
+            self._token_cache.parent.mkdir(parents=True, exist_ok=True, mode=0o700)
+            # The temporary file is created with mode 0600 and atomically replaces the old token
+            fd, tmp_path = tempfile.mkstemp(dir=self._token_cache.parent, prefix=".token-")
+            try:
+                with os.fdopen(fd, "w") as tmp_file:
+                    json.dump(dict(self.client.token), tmp_file)
+                os.replace(tmp_path, self._token_cache)
+            except OSError:
+                os.unlink(tmp_path)
+                raise
 
     def domain_account_id(self) -> str:
         token = self.client.token["access_token"]
@@ -135,20 +261,40 @@ class SHClient:
         return payload["user_context_id"]
 
     def get_token(self) -> None:
-        if self.client.token.is_expired():
-            self.client.fetch_token(self.auth_url)
+        """Refresh the access token shortly before it expires, so it doesn't run out during a request."""
+        if time.time() < self._refresh_at:
+            return
+        # Concurrent requests wait for a single refresh instead of each fetching a token
+        with self._token_lock:
+            if time.time() >= self._refresh_at:
+                self._fetch_token()
+
+    def _request(self, method: str, *args: Any, **kwargs: Any) -> Response:
+        """
+        Send a request with the current token. If the server rejects the token before it expires, e.g. because it
+        was revoked, the token is dropped from the cache and the request is retried once with a new token.
+        """
+        self.get_token()
+        authorization = self._session.headers["Authorization"]
+        response = self._session.request(method, *args, **kwargs)
+        if response.status_code != 401:
+            return response
+        with self._token_lock:
+            # Requests which were rejected at the same time only fetch one new token
+            if self._session.headers["Authorization"] == authorization:
+                with suppress(OSError):
+                    self._token_cache.unlink()
+                self._fetch_token()
+        return self._session.request(method, *args, **kwargs)
 
     def post(self, *args: Any, **kwargs: Any) -> Response:
-        self.get_token()
-        return self.client.post(*args, **kwargs)
+        return self._request("POST", *args, **kwargs)
 
     def delete(self, *args: Any, **kwargs: Any) -> Response:
-        self.get_token()
-        return self.client.delete(*args, **kwargs)
+        return self._request("DELETE", *args, **kwargs)
 
     def get(self, *args: Any, **kwargs: Any) -> Response:
-        self.get_token()
-        return self.client.get(*args, **kwargs)
+        return self._request("GET", *args, **kwargs)
 
 
 class BYOC(Resource):
@@ -177,7 +323,8 @@ class BYOC(Resource):
         assert isinstance(self.byoc_id, str)
         return self.byoc_id
 
-    def ingest_tile(self, sensing_time: datetime.date, feature_id: str | int) -> None:
+    def _post_tile(self, sensing_time: datetime.date, feature_id: str | int) -> str:
+        """Register a tile of the collection for ingestion and return its ID."""
         tile_json = {
             "path": f"{self.folder_name}/{feature_id}/(BAND).tif",
             "sensingTime": f"{sensing_time.isoformat()}T00:00:00Z",
@@ -188,13 +335,18 @@ class BYOC(Resource):
         except HTTPError as e:
             print(f"Request failed: {e.response.status_code} - {e.response.text}")
             raise
-        tile_id = tile_request.json()["data"]["id"]
-
-        print("... Waiting for collection to finish ingestion")
-        # wait for zarr collection to fully ingest
+        return tile_request.json()["data"]["id"]
+
+    def _wait_for_tile(self, tile_id: str) -> None:
+        """Wait until a tile is ingested, raising if its ingestion failed."""
+        # wait for zarr collection to fully ingest, polling quickly at first for small tiles and backing off
+        # with some jitter so concurrent ingestions don't poll in lockstep
+        tile_url = f"{self.url}/{self.byoc_id}/tiles/{tile_id}"
+        delay = INGESTION_POLL_INITIAL
         while True:
-            sleep(5)
-            tile = self.client.get(f"{self.url}/{self.byoc_id}/tiles/{tile_id}").json()
+            time.sleep(delay + random.uniform(0, delay * 0.1))
+            delay = min(delay * 1.5, INGESTION_POLL_MAX)
+            tile = self.client.get(tile_url).json()
             status = tile["data"]["status"]
             if status == "INGESTED":
                 break
@@ -202,6 +354,30 @@ class BYOC(Resource):
                 raise RuntimeError(
                     f"Ingestion of tile failed: {tile['data']['additionalData']['failedIngestionCause']}"
                 )
+
+    def ingest_tile(self, sensing_time: datetime.date, feature_id: str | int) -> None:
+        tile_id = self._post_tile(sensing_time, feature_id)
+
+        print("... Waiting for collection to finish ingestion")
+        self._wait_for_tile(tile_id)
+        print("... Ingested")
+
+    def ingest_tiles(self, tiles: list[tuple[datetime.date, str | int]]) -> None:
+        """
+        Ingest several tiles at once. All tiles are registered first and then awaited concurrently, so the total
+        wait is about as long as the slowest ingestion.
+
+        Args:
+            tiles: List of (sensing_time, feature_id) tuples
+        """
+        if not tiles:
+            return
+        tile_ids = [self._post_tile(sensing_time, feature_id) for sensing_time, feature_id in tiles]
+
+        print(f"... Waiting for collection to finish ingestion of {len(tile_ids)} tiles")
+        with ThreadPoolExecutor(max_workers=min(len(tile_ids), INGESTION_MAX_WORKERS)) as executor:
+            # Consume the results, so a failed ingestion raises here
+            list(executor.map(self._wait_for_tile, tile_ids))
         print("... Ingested")
 
     def share_byoc(self, account_id: str):
@@ -314,7 +490,10 @@ class SHConfiguration(Resource):
             "toTime": f"{date}T00:00:00.000Z",
             "layerId": layer_id,
         }
-        return root_url + "&".join([f"{k}={v}" for k, v in query_params.items()])
+        if not root_url.endswith(("?", "&")):
+            root_url += "&" if "?" in root_url else "?"
+        # Colons in the times are left as is, everything else which isn't URL safe is escaped
+        return root_url + urlencode(query_params, quote_via=quote, safe=":")
 
     def delete(self) -> None:
         """Delete the Configuration"""
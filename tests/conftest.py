@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+GEOJSON_INPUT = {
+    "type": "FeatureCollection",
+    "name": "pytestProcessAPI",
+    "crs": {"type": "name", "properties": {"name": "urn:ogc:def:crs:OGC:1.3:CRS84"}},
+    "features": [
+        {
+            "type": "Feature",
+            "properties": {"MONITOR_FEATURE_ID": 1},
+            "geometry": {
+                "type": "Polygon",
+                "coordinates": [
+                    [
+                        [-96.633894, 40.89311],
+                        [-96.628745, 40.89311],
+                        [-96.628745, 40.896549],
+                        [-96.633894, 40.896549],
+                        [-96.633894, 40.89311],
+                    ]
+                ],
+            },
+        },
+        {
+            "type": "Feature",
+            "properties": {"MONITOR_FEATURE_ID": 2},
+            "geometry": {
+                "type": "Polygon",
+                "coordinates": [
+                    [
+                        [-96.634092, 40.896499],
+                        [-96.634092, 40.893122],
+                        [-96.637665, 40.893133],
+                        [-96.637653, 40.896464],
+                        [-96.634092, 40.896499],
+                    ]
+                ],
+            },
+        },
+    ],
+}
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--run-network", action="store_true", default=False, help="Run the tests which call the remote APIs"
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "network: test calls the Sentinel Hub / CDSE APIs, needs --run-network")
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip the tests which call the remote APIs unless --run-network is passed."""
+    if config.getoption("--run-network"):
+        return
+    skip_network = pytest.mark.skip(reason="needs --run-network to call the remote APIs")
+    for item in items:
+        if "network" in item.keywords:
+            item.add_marker(skip_network)
+
+
+@pytest.fixture(scope="session")
+def geojson_input(tmp_path_factory):
+    """Write the test geometries to a GeoJSON file, once for all tests."""
+    input_file = tmp_path_factory.mktemp("geojson") / "valid.geojson"
+    with input_file.open("w") as f:
+        json.dump(GEOJSON_INPUT, f, separators=(",", ":"))
+    return input_file
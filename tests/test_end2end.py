@@ -1,49 +1,36 @@
+import os
 from datetime import date
+from functools import cache
 
 import pytest
 from dotenv import dotenv_values
 
 import disturbancemonitor as dm
+from disturbancemonitor.monitor_params import MonitorParameters
+
+# Tests sharing the default config file run on the same pytest-xdist worker, the others run in parallel
+default_config_group = pytest.mark.xdist_group(name="default_config")
+
+
+@cache
+def _parse_env(env_file):
+    """Read the variables of an .env file, each file is only parsed once per session."""
+    return dotenv_values(env_file)
 
 
 @pytest.fixture
 def load_env(monkeypatch, request):
     """Load the specified .env file and apply its variables using monkeypatch."""
     env_file = request.param
-    env_vars = dotenv_values(env_file)  # Read variables from the .env file
+    env_vars = _parse_env(env_file)  # Read variables from the .env file
     for key, value in env_vars.items():
-        monkeypatch.setenv(key, value)  # Set each variable in the test environment
-
-
-@pytest.fixture
-def geojson_input(tmp_path):
-    input_file = tmp_path / "valid.geojson"
-    input_geojson_string = """
-{
-    "type": "FeatureCollection",
-    "name": "pytestProcessAPI",
-    "crs": { "type": "name", "properties": { "name": "urn:ogc:def:crs:OGC:1.3:CRS84" } },
-    "features": [
-        { "type": "Feature", "properties": { "MONITOR_FEATURE_ID": 1 },
-        "geometry": { "type": "Polygon", "coordinates": [ [
-        [ -96.633894, 40.89311 ], [ -96.628745, 40.89311 ],
-        [ -96.628745, 40.896549 ], [ -96.633894, 40.896549 ],
-        [ -96.633894, 40.89311 ] ] ] } },
-        { "type": "Feature", "properties": { "MONITOR_FEATURE_ID": 2 },
-        "geometry": { "type": "Polygon", "coordinates": [ [
-        [ -96.634092, 40.896499 ],
-        [ -96.634092, 40.893122 ],
-        [ -96.637665, 40.893133 ],
-        [ -96.637653, 40.896464 ],
-        [ -96.634092, 40.896499 ] ] ] } }
-    ]
-}
-
-    """
-    input_file.write_text(input_geojson_string)
-    return input_file
+        # Set each variable in the test environment, unless it already has this value
+        if os.environ.get(key) != value:
+            monkeypatch.setenv(key, value)
 
 
+@pytest.mark.network
+@default_config_group
 @pytest.mark.parametrize(
     ("load_env", "endpoint"),
     [
@@ -72,6 +59,8 @@ def test_process_api(load_env, endpoint, geojson_input):  # noqa: ARG001
     print(results)
 
 
+@pytest.mark.network
+@default_config_group
 @pytest.mark.parametrize(
     ("load_env", "endpoint"),
     [
@@ -150,6 +139,7 @@ def test_custom_config_path(load_env, endpoint, geojson_input, tmp_path):  # noq
     print(f"Custom config test completed successfully. Results: {results}")
 
 
+@default_config_group
 def test_custom_config_basic(geojson_input, tmp_path):
     """Test basic custom config functionality without external dependencies."""
     # Create custom config file path
@@ -164,10 +154,6 @@ def test_custom_config_basic(geojson_input, tmp_path):
     config.prepare_geometry(geojson_input, "MONITOR_FEATURE_ID", monitor_name)
 
     # Test 3: Create and save monitor parameters
-    from datetime import date
-
-    from disturbancemonitor.monitor_params import MonitorParameters
-
     params = MonitorParameters(
         name=monitor_name,
         monitoring_start=date(2023, 1, 1),
@@ -200,6 +186,8 @@ def test_custom_config_basic(geojson_input, tmp_path):
     print("Basic custom config test completed successfully")
 
 
+@pytest.mark.network
+@pytest.mark.xdist_group(name="free_cdse")
 def test_free_cdse(geojson_input, tmp_path):
     """Test FreeCDSEProcessAPI initialization with different SH profiles."""
 
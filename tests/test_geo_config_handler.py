@@ -0,0 +1,288 @@
+import json
+import shutil
+import sqlite3
+from contextlib import closing
+from datetime import date
+
+import geopandas as gpd
+import numpy as np
+import pytest
+import shapely
+
+from disturbancemonitor.constants import FEATURE_ID_COLUMN
+from disturbancemonitor.geo_config_handler import GeoConfigHandler, _register_gpkg_functions
+from disturbancemonitor.monitor_params import MonitorParameters
+
+RTREE_TABLE = "rtree_areas_of_interest_geom"
+
+
+@pytest.fixture
+def config(tmp_path):
+    """A GeoConfigHandler on a new GeoPackage, closed after the test."""
+    with GeoConfigHandler(tmp_path / "config.gpkg") as handler:
+        yield handler
+
+
+@pytest.fixture
+def monitor(config, geojson_input):
+    """Name of a monitor saved with the test geometries."""
+    name = "monitor"
+    config.prepare_geometry(geojson_input, "MONITOR_FEATURE_ID", name)
+    config.save_monitor_params(
+        MonitorParameters(
+            name=name,
+            monitoring_start=date(2023, 1, 1),
+            last_monitored=date(2023, 1, 1),
+            geometry_path=name,
+            resolution=100.0,
+        )
+    )
+    return name
+
+
+@pytest.fixture
+def geojson_with_empty(geojson_input, tmp_path):
+    """The test geometries and an additional feature with an empty polygon."""
+    geojson = json.loads(geojson_input.read_text())
+    geojson["features"].append(
+        {
+            "type": "Feature",
+            "properties": {"MONITOR_FEATURE_ID": 3},
+            "geometry": {"type": "Polygon", "coordinates": []},
+        }
+    )
+    input_file = tmp_path / "with_empty.geojson"
+    input_file.write_text(json.dumps(geojson))
+    return input_file
+
+
+def _connect(config):
+    """Open a separate connection to the GeoPackage of a handler, able to run the spatial index triggers."""
+    conn = sqlite3.connect(config.config_file_path)
+    _register_gpkg_functions(conn)
+    return closing(conn)
+
+
+def test_prepare_geometry_writes_geopackage(config, geojson_with_empty):
+    """Features written without GDAL read back unchanged and are indexed like GDAL would index them."""
+    config.prepare_geometry(geojson_with_empty, "MONITOR_FEATURE_ID", "monitor")
+
+    expected = gpd.read_file(geojson_with_empty, engine="pyogrio").to_crs(epsg=3857)
+    stored = gpd.read_file(config.config_file_path, layer="areas_of_interest", engine="pyogrio", fid_as_index=True)
+    stored = stored.sort_values(FEATURE_ID_COLUMN)
+
+    # Geometries and bounds survive the round trip through the GeoPackage blobs
+    assert stored.crs.to_epsg() == 3857
+    assert stored[FEATURE_ID_COLUMN].tolist() == [1, 2, 3]
+    assert stored.geometry.is_empty.tolist() == [False, False, True]
+    assert shapely.equals_exact(stored.geometry.to_numpy(), expected.geometry.to_numpy(), tolerance=0).all()
+    np.testing.assert_array_equal(stored.bounds.to_numpy(), expected.bounds.to_numpy())
+
+    non_empty = stored[~stored.geometry.is_empty]
+    with _connect(config) as conn:
+        # One spatial index row per non-empty feature, with its bounds
+        rtree = {
+            fid: (minx, maxx, miny, maxy)
+            for fid, minx, maxx, miny, maxy in conn.execute(f"SELECT id, minx, maxx, miny, maxy FROM {RTREE_TABLE}")
+        }
+        assert sorted(rtree) == sorted(non_empty.index)
+        for fid, (minx, miny, maxx, maxy) in zip(non_empty.index, non_empty.bounds.to_numpy(), strict=True):
+            # The R-tree stores 32 bit floats
+            assert rtree[fid] == pytest.approx((minx, maxx, miny, maxy), rel=1e-6)
+
+        # The layer extent covers the non-empty features
+        extent = conn.execute(
+            "SELECT min_x, min_y, max_x, max_y FROM gpkg_contents WHERE table_name = 'areas_of_interest'"
+        ).fetchone()
+        assert extent == pytest.approx(tuple(non_empty.total_bounds))
+
+        # The ST_* functions of the spatial index triggers read the envelope from the blobs
+        envelopes = {
+            fid: (is_empty, minx, maxx, miny, maxy)
+            for fid, is_empty, minx, maxx, miny, maxy in conn.execute(
+                """
+                SELECT fid, ST_IsEmpty(geom), ST_MinX(geom), ST_MaxX(geom), ST_MinY(geom), ST_MaxY(geom)
+                FROM areas_of_interest
+                """
+            )
+        }
+        for fid, (minx, miny, maxx, maxy) in zip(stored.index, stored.bounds.to_numpy(), strict=True):
+            if np.isnan(minx):
+                assert envelopes[fid] == (1, None, None, None, None)
+            else:
+                assert envelopes[fid] == (0, minx, maxx, miny, maxy)
+
+        # Updating a geometry to an empty one runs the update triggers, which drop it from the index
+        empty_fid = stored.index[stored.geometry.is_empty][0]
+        conn.execute(
+            "UPDATE areas_of_interest SET geom = (SELECT geom FROM areas_of_interest WHERE fid = ?) WHERE fid = ?",
+            (int(empty_fid), int(non_empty.index[0])),
+        )
+        conn.commit()
+        assert [row[0] for row in conn.execute(f"SELECT id FROM {RTREE_TABLE}")] == [non_empty.index[1]]
+
+
+def test_append_geometries_keeps_spatial_index_on_error(config, geojson_input):
+    """A failed append is rolled back completely, including the suspended insert trigger of the spatial index."""
+    config.prepare_geometry(geojson_input, "MONITOR_FEATURE_ID", "monitor")
+    duplicate = config.load_geometry("monitor").iloc[:1]
+
+    with pytest.raises(ValueError, match="Duplicate ID found"):
+        config.append_geometries("monitor", duplicate)
+
+    with _connect(config) as conn:
+        triggers = conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name = ?", (f"{RTREE_TABLE}_insert",)
+        ).fetchone()[0]
+        assert triggers == 1
+        rtree_rows = conn.execute(f"SELECT COUNT(*) FROM {RTREE_TABLE}").fetchone()[0]
+        features = conn.execute("SELECT COUNT(*) FROM areas_of_interest").fetchone()[0]
+        assert rtree_rows == features == 2
+
+
+def test_batch_writes_are_visible_after_commit(config):
+    """Loaders inside a batch don't see its pending writes, they see them once the batch is committed."""
+    params = MonitorParameters(
+        name="batched",
+        monitoring_start=date(2023, 1, 1),
+        last_monitored=date(2023, 1, 1),
+        geometry_path="batched",
+        resolution=100.0,
+    )
+    with config.batch():
+        config.save_monitor_params(params)
+        assert not config.monitor_exists("batched")
+        assert config.load_all_monitors() == []
+
+    assert config.monitor_exists("batched")
+    assert config.load_all_monitors() == ["batched"]
+
+
+def _pixel_counts(config, monitor, column):
+    """Get a pixel count column of the areas_of_interest table by feature ID."""
+    geometry = config.load_geometry(monitor)
+    return dict(zip(geometry[FEATURE_ID_COLUMN].tolist(), geometry[column].tolist(), strict=True))
+
+
+def test_save_monitoring_results_twice(config, monitor):
+    """Results which are saved again aren't counted twice in the disturbed pixel totals."""
+    config.save_monitoring_results(
+        monitor,
+        {
+            1: {"monitorResults": {"230105": {"monitoredPixels": 10, "disturbedPixels": 1}}},
+            2: {"monitorResults": {"230105": {"monitoredPixels": 5, "disturbedPixels": 4}}},
+        },
+    )
+    # The second save overlaps with the first on 2023-01-05
+    config.save_monitoring_results(
+        monitor,
+        {
+            1: {
+                "monitorResults": {
+                    "230105": {"monitoredPixels": 10, "disturbedPixels": 1},
+                    "230110": {"monitoredPixels": 9, "disturbedPixels": 2},
+                }
+            },
+        },
+    )
+
+    assert _pixel_counts(config, monitor, "disturbed_pixels") == {1: 3, 2: 4}
+    assert config.load_monitoring_results(monitor) == {
+        "1": {
+            date(2023, 1, 5): {"monitored_pixels": 10, "disturbed_pixels": 1},
+            date(2023, 1, 10): {"monitored_pixels": 9, "disturbed_pixels": 2},
+        },
+        "2": {date(2023, 1, 5): {"monitored_pixels": 5, "disturbed_pixels": 4}},
+    }
+
+
+def test_update_many_monitored_pixels(config, monitor):
+    """The batch update writes one count per feature and ignores unknown features."""
+    config.update_many_monitored_pixels(monitor, [(1, 42), ("2", 7), (99, 1)])
+
+    assert _pixel_counts(config, monitor, "monitored_pixels") == {1: 42, 2: 7}
+
+
+def _copy_config(config, path, schema_version):
+    """
+    Copy the GeoPackage of a closed handler with the given schema version, None removes it. The copy is not yet known
+    as initialized to this process, so opening it runs the migrations.
+    """
+    shutil.copy(config.config_file_path, path)
+    with closing(sqlite3.connect(path)) as conn, conn:
+        if schema_version is None:
+            conn.execute("DELETE FROM metadata WHERE key = 'schema_version'")
+        else:
+            conn.execute("UPDATE metadata SET value = ? WHERE key = 'schema_version'", (schema_version,))
+    return path
+
+
+def test_migrate_monitored_pixel_counts(config, monitor, tmp_path):
+    """Files from schema version 4 counted the pixels of both metric bands, their counts are halved exactly once."""
+    config.update_many_monitored_pixels(monitor, [(1, 42), (2, 8)])
+    config.close()
+
+    with GeoConfigHandler(_copy_config(config, tmp_path / "v4.gpkg", "4")) as migrated:
+        assert _pixel_counts(migrated, monitor, "monitored_pixels") == {1: 21, 2: 4}
+        migrated.close()
+        # The migrated file is on the current version, opening it again doesn't halve the counts a second time
+        with GeoConfigHandler(shutil.copy(migrated.config_file_path, tmp_path / "migrated.gpkg")) as reopened:
+            assert _pixel_counts(reopened, monitor, "monitored_pixels") == {1: 21, 2: 4}
+
+
+@pytest.mark.parametrize("schema_version", ["5", None])
+def test_keep_monitored_pixel_counts(config, monitor, tmp_path, schema_version):
+    """Counts of current files and of files without a schema version, which could be anything, are kept."""
+    config.update_many_monitored_pixels(monitor, [(1, 42), (2, 8)])
+    config.close()
+
+    with GeoConfigHandler(_copy_config(config, tmp_path / "copy.gpkg", schema_version)) as reopened:
+        assert _pixel_counts(reopened, monitor, "monitored_pixels") == {1: 42, 2: 8}
+
+
+@pytest.fixture
+def geojson_duplicate_ids(geojson_input, tmp_path):
+    """The test geometries, both with the same feature ID."""
+    geojson = json.loads(geojson_input.read_text())
+    for feature in geojson["features"]:
+        feature["properties"]["MONITOR_FEATURE_ID"] = 1
+    input_file = tmp_path / "duplicate_ids.geojson"
+    input_file.write_text(json.dumps(geojson))
+    return input_file
+
+
+def test_prepare_geometry_rejects_duplicate_ids(config, geojson_duplicate_ids):
+    """Duplicate feature IDs are rejected and nothing of the geometry is saved."""
+    with pytest.raises(ValueError, match="Duplicate ID found"):
+        config.prepare_geometry(geojson_duplicate_ids, "MONITOR_FEATURE_ID", "monitor")
+
+    with _connect(config) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM areas_of_interest").fetchone()[0] == 0
+
+
+@pytest.mark.usefixtures("monitor")
+def test_prepare_geometry_rejects_duplicate_ids_without_unique_index(config, geojson_duplicate_ids, tmp_path):
+    """Files which already held duplicate IDs get a non-unique index, duplicates are still rejected for them."""
+    config.close()
+    old_file = tmp_path / "duplicates_config.gpkg"
+    shutil.copy(config.config_file_path, old_file)
+    with closing(sqlite3.connect(old_file)) as conn, conn:
+        _register_gpkg_functions(conn)
+        conn.execute("DROP INDEX idx_areas_of_interest_monitor_feature")
+        conn.execute(
+            f"""
+            INSERT INTO areas_of_interest (geom, monitor_name, {FEATURE_ID_COLUMN})
+            SELECT geom, monitor_name, {FEATURE_ID_COLUMN} FROM areas_of_interest WHERE {FEATURE_ID_COLUMN} = 1
+            """
+        )
+        conn.execute("UPDATE metadata SET value = '4' WHERE key = 'schema_version'")
+
+    with GeoConfigHandler(old_file) as migrated:
+        with _connect(migrated) as conn:
+            unique = {row[1]: row[2] for row in conn.execute("PRAGMA index_list(areas_of_interest)")}
+        assert unique["idx_areas_of_interest_monitor_feature"] == 0
+
+        with pytest.raises(ValueError, match="Duplicate ID found"):
+            migrated.prepare_geometry(geojson_duplicate_ids, "MONITOR_FEATURE_ID", "other")
+        with pytest.raises(KeyError):
+            migrated.load_geometry("other")
@@ -0,0 +1,178 @@
+import json
+import stat
+import time
+from io import BytesIO
+
+import pytest
+from authlib.integrations.requests_client import OAuth2Session
+from requests import Response, Session
+
+from disturbancemonitor import resources
+from disturbancemonitor.resources import TOKEN_EXPIRY_MARGIN, SHClient
+
+AUTH_URL = "https://auth.example.com/token"
+
+
+@pytest.fixture
+def token_endpoint(monkeypatch, tmp_path):
+    """
+    Replace the token endpoint with a counter which hands out numbered tokens, valid for `lifetime` seconds.
+    Tokens are cached in a temporary directory.
+    """
+    monkeypatch.setenv("SH_CLIENT_ID", "client-id")
+    monkeypatch.setenv("SH_CLIENT_SECRET", "client-secret")
+    monkeypatch.setattr(resources, "TOKEN_CACHE_PATH", tmp_path / "tokens")
+
+    class TokenEndpoint:
+        calls = 0
+        lifetime = 3600
+
+    def fetch_token(session, url=None, **kwargs):  # noqa: ARG001
+        TokenEndpoint.calls += 1
+        session.token = {
+            "access_token": f"token-{TokenEndpoint.calls}",
+            "token_type": "Bearer",
+            "expires_at": time.time() + TokenEndpoint.lifetime,
+        }
+        return session.token
+
+    monkeypatch.setattr(OAuth2Session, "fetch_token", fetch_token)
+    return TokenEndpoint
+
+
+def _cached_token_files(tmp_path):
+    return list((tmp_path / "tokens").glob("token-*.json"))
+
+
+def test_token_cache_is_reused(token_endpoint, tmp_path):
+    """A second client with the same credentials uses the cached token instead of fetching one."""
+    SHClient(AUTH_URL)
+    client = SHClient(AUTH_URL)
+
+    assert token_endpoint.calls == 1
+    assert client.client.token["access_token"] == "token-1"
+    (token_file,) = _cached_token_files(tmp_path)
+    assert stat.S_IMODE(token_file.stat().st_mode) == 0o600
+    assert json.loads(token_file.read_text())["access_token"] == "token-1"
+
+
+def test_token_is_refreshed_within_margin(token_endpoint, tmp_path):
+    """Tokens expiring within the margin are neither used from the cache nor for new requests."""
+    token_endpoint.lifetime = TOKEN_EXPIRY_MARGIN - 1
+    client = SHClient(AUTH_URL)
+    assert token_endpoint.calls == 1
+
+    client.get_token()
+    assert token_endpoint.calls == 2
+
+    SHClient(AUTH_URL)
+    assert token_endpoint.calls == 3
+    (token_file,) = _cached_token_files(tmp_path)
+    assert json.loads(token_file.read_text())["access_token"] == "token-3"
+
+
+def test_rejected_token_is_replaced(token_endpoint, tmp_path, monkeypatch):
+    """A token the server rejects is dropped from the cache and the request is retried with a new token."""
+    client = SHClient(AUTH_URL)
+    sent_tokens = []
+
+    def request(session, method, url, **kwargs):  # noqa: ARG001
+        sent_tokens.append(session.headers["Authorization"])
+        response = Response()
+        response.status_code = 401 if len(sent_tokens) == 1 else 200
+        return response
+
+    monkeypatch.setattr(Session, "request", request)
+    response = client.get("https://services.example.com/api")
+
+    assert response.status_code == 200
+    assert token_endpoint.calls == 2
+    assert sent_tokens == ["Bearer token-1", "Bearer token-2"]
+    (token_file,) = _cached_token_files(tmp_path)
+    assert json.loads(token_file.read_text())["access_token"] == "token-2"
+
+
+class StubS3Client:
+    """S3 client which keeps a bucket policy and uploads in memory and records how often the policy is written."""
+
+    class exceptions:  # noqa: N801
+        class NoSuchBucketPolicy(Exception):
+            pass
+
+        @classmethod
+        def from_code(cls, code):
+            return getattr(cls, code)
+
+    def __init__(self, policy=None):
+        self.policy = policy
+        self.puts = 0
+        self.uploads = {}
+
+    def get_bucket_policy(self, Bucket):  # noqa: ARG002, N803
+        if self.policy is None:
+            raise self.exceptions.NoSuchBucketPolicy
+        return {"Policy": json.dumps(self.policy)}
+
+    def put_bucket_policy(self, Bucket, Policy):  # noqa: ARG002, N803
+        self.puts += 1
+        self.policy = json.loads(Policy)
+
+    def upload_fileobj(self, Fileobj, Bucket, Key, Config=None):  # noqa: ARG002, N803
+        self.uploads[Bucket, Key] = Fileobj.read()
+
+
+def _statement(sid):
+    return {"Sid": sid, "Effect": "Allow", "Principal": "*", "Action": "s3:GetObject", "Resource": "*"}
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    """Factory for S3 resources on a stubbed client, which starts with the given bucket policy."""
+
+    def create(policy=None):
+        client = StubS3Client(policy)
+        monkeypatch.setattr(resources, "_s3_client", lambda profile: (None, client))  # noqa: ARG005
+        return resources.S3("bucket", "folder"), client
+
+    return create
+
+
+def test_update_policy_adds_missing_statement(s3):
+    """A missing statement is added to an existing policy, which keeps its statements."""
+    resource, client = s3({"Version": "2012-10-17", "Statement": [_statement("existing")]})
+    resource.update_policy([_statement("new"), _statement("new")])
+
+    assert client.puts == 1
+    assert [statement["Sid"] for statement in client.policy["Statement"]] == ["existing", "new"]
+
+
+def test_update_policy_creates_policy(s3):
+    """A bucket without a policy gets a new one."""
+    resource, client = s3()
+    resource.update_policy([_statement("new")])
+
+    assert client.puts == 1
+    assert client.policy == {"Version": "2012-10-17", "Statement": [_statement("new")]}
+
+
+def test_update_policy_skips_present_statements(s3):
+    """The policy isn't written when all statements are present, also not for statements this instance added."""
+    resource, client = s3({"Version": "2012-10-17", "Statement": [_statement("existing")]})
+    resource.update_policy([_statement("existing")])
+    assert client.puts == 0
+
+    resource.update_policy([_statement("new")])
+    resource.update_policy([_statement("existing"), _statement("new")])
+    assert client.puts == 1
+    assert [statement["Sid"] for statement in client.policy["Statement"]] == ["existing", "new"]
+
+
+def test_write_binary_uploads_to_key(s3):
+    """Files under the root are uploaded to their key in the bucket, files outside the bucket are rejected."""
+    resource, client = s3()
+    resource.write_binary(f"{resource.root}/1/c.tif", BytesIO(b"data"))
+    assert client.uploads == {("bucket", "folder/1/c.tif"): b"data"}
+
+    with pytest.raises(ValueError, match="not in the bucket"):
+        resource.write_binary("s3://other-bucket/folder/1/c.tif", BytesIO(b"data"))
+    assert len(client.uploads) == 1